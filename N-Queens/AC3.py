@@ -30,10 +30,12 @@ class CSPSolver:
     # arcs: list of tuples
     # domains: dict of { tuples: list }
     # constraints: dict of { tuples: list }
-    def __init__(self, arcs: list, domains: dict, constraints: dict):
+    # stats: SearchStats (search_stats.py) counting the revise calls and removed values, or None
+    def __init__(self, arcs: list, domains: dict, constraints: dict, stats=None):
         self.arcs = arcs
         self.domains = domains
         self.constraints = constraints
+        self.stats = stats
 
     # returns an empty dict if an inconsistency is found and domains for variables otherwise
     # generate: bool (choose whether or not to use a generator)
@@ -85,6 +87,7 @@ class CSPSolver:
     # returns true if and only if the given domain i
     def revise(self, xi: object, xj: object) -> bool:
         revised = False
+        removed = 0
 
         # get the domains for xi and xj
         xi_domain = self.domains[xi]
@@ -108,5 +111,9 @@ class CSPSolver:
                 # delete x from xiDomain
                 xi_domain.remove(x)
                 revised = True
+                removed += 1
+
+        if self.stats is not None:
+            self.stats.revise(removed)
 
         return revised
\ No newline at end of file
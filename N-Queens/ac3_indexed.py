@@ -0,0 +1,220 @@
+"""
+Indexed AC-3 engine with the same interface as AC3.CSPSolver.
+
+Differences from AC3.CSPSolver:
+    - all the state (worklist included) belongs to the instance, nothing is shared
+    - the constraints of an arc and the arcs pointing to a variable are looked up in
+      indexes built once in the constructor instead of scanning all constraints/arcs
+    - the worklist is a deque of arc indexes and an arc is never queued twice
+    - a domain is kept as a bitset over the indexes of its initial values
+    - the last support found for each value is cached (residual supports in the style
+      of AC-2001), so a value is rechecked only if its support was removed
+    - after the domain of xi shrinks, the arcs (xk, xi) are queued, as AC-3 requires
+      (AC3.CSPSolver queues the arcs (xj, xk) instead and may stop before the domains
+      are arc consistent, so this engine can prune more, never less). The arc (xj, xi)
+      is queued too, the constraints of (xi, xj) and (xj, xi) are independent functions.
+
+The domains passed in are not modified, solve() returns new lists.
+
+For a search, the engine can also be kept alive from node to node: assign() reduces
+the domain of one variable, queues only the arcs into it and propagates, every domain
+change is recorded on a trail and undo() restores the domains to an earlier mark(),
+so nothing is copied or propagated again from scratch.
+"""
+from collections import deque
+
+
+class IndexedCSPSolver:
+    # arcs: list of tuples
+    # domains: dict of { variable: list }
+    # constraints: dict of { tuples: function }, the first two items of the key are the arc
+    # stats: SearchStats (search_stats.py) counting the revise calls and removed values, or None
+    def __init__(self, arcs: list, domains: dict, constraints: dict, support_cache: bool = True, stats=None):
+        self.arcs = arcs
+        self.domains = domains
+        self.constraints = constraints
+        self.stats = stats
+
+        # Values of every variable, the i-th value is the i-th bit of the domain bitset
+        self.values = {x: list(domain) for x, domain in domains.items()}
+        self.bits = {x: (1 << len(domain)) - 1 for x, domain in domains.items()}
+
+        # Constraint functions of each arc, several constraints on one arc are alternatives
+        # (a pair of values is consistent if it satisfies any of them, as in AC3.CSPSolver)
+        checks = {}
+        for key, check_function in constraints.items():
+            checks.setdefault((key[0], key[1]), []).append(check_function)
+
+        self.arc_index = {}
+        for arc in arcs:
+            self.arc_index.setdefault(tuple(arc), len(self.arc_index))
+        self.arc_list = list(self.arc_index)
+        self.arc_checks = [checks.get(arc, []) for arc in self.arc_list]
+
+        # Indexes of the arcs (xk, xi) pointing to each variable xi
+        self.arcs_into = {}
+        for index, (xi, xj) in enumerate(self.arc_list):
+            self.arcs_into.setdefault(xj, []).append(index)
+
+        # Residual supports, support[arc][a] is the index of the last support of value a
+        if support_cache:
+            self.support = [[-1] * len(self.values[xi]) for xi, _ in self.arc_list]
+        else:
+            self.support = None
+
+        self.worklist = deque()
+        self.in_worklist = bytearray(len(self.arc_list))
+
+        # Undo trail of the domain changes, a list of (variable, previous bitset)
+        self.trail = []
+
+    # returns an empty dict if an inconsistency is found and domains for variables otherwise
+    # generate: bool (choose whether or not to use a generator)
+    def solve(self, generate=False) -> dict:
+        if generate:
+            return self.solve_helper()
+
+        self.enqueue(range(len(self.arc_list)))
+        if not self.propagate():
+            return None  # inconsistency found
+        return self.current_domains()
+
+    # returns a generator for each step in the algorithm, including the end result
+    # each yield is a tuple containing: (edge, new domains, edges to consider)
+    def solve_helper(self) -> dict:
+        self.enqueue(range(len(self.arc_list)))
+
+        while self.worklist:
+            index = self.worklist.popleft()
+            self.in_worklist[index] = 0
+            xi, xj = self.arc_list[index]
+
+            if self.revise_index(index):
+                if not self.bits[xi]:
+                    # found an inconsistency
+                    yield None
+                    break
+
+                neighbors = [self.arc_list[k] for k in self.arcs_into.get(xi, [])]
+                self.enqueue(self.arc_index[arc] for arc in neighbors)
+                yield ((xi, xj), self.current_domains(), neighbors)
+            else:
+                yield ((xi, xj), self.current_domains(), None)
+
+        # yield the final return value
+        yield (None, self.current_domains(), None)
+
+    def enqueue(self, indexes):
+        for index in indexes:
+            if not self.in_worklist[index]:
+                self.in_worklist[index] = 1
+                self.worklist.append(index)
+
+    # runs AC-3 until the worklist is empty, returns False if a domain is wiped out
+    def propagate(self) -> bool:
+        worklist = self.worklist
+        in_worklist = self.in_worklist
+        while worklist:
+            index = worklist.popleft()
+            in_worklist[index] = 0
+            if self.revise_index(index):
+                xi = self.arc_list[index][0]
+                if not self.bits[xi]:
+                    while worklist:  # Only the queued arcs have their flag set
+                        in_worklist[worklist.pop()] = 0
+                    return False
+                for k in self.arcs_into.get(xi, ()):
+                    if not in_worklist[k]:
+                        in_worklist[k] = 1
+                        worklist.append(k)
+        return True
+
+    # Position in the trail to undo to
+    def mark(self) -> int:
+        return len(self.trail)
+
+    # Restores the domains as they were when the trail was at the position mark
+    def undo(self, mark: int):
+        trail = self.trail
+        bits = self.bits
+        while len(trail) > mark:
+            x, old_bits = trail.pop()
+            bits[x] = old_bits
+
+    # Reduces the domain of x to the single value, propagates the change
+    # and returns False if a domain is wiped out. Call undo() to take it back.
+    def assign(self, x: object, value: object) -> bool:
+        index = self.values[x].index(value)
+        bit = 1 << index
+        old_bits = self.bits[x]
+        if not old_bits & bit:
+            return False
+        if old_bits != bit:
+            self.trail.append((x, old_bits))
+            self.bits[x] = bit
+            self.enqueue(self.arcs_into.get(x, ()))
+        return self.propagate()
+
+    def current_domain(self, x: object) -> list:
+        bits = self.bits[x]
+        return [value for i, value in enumerate(self.values[x]) if bits >> i & 1]
+
+    def current_domains(self) -> dict:
+        domains = {}
+        for x, values in self.values.items():
+            bits = self.bits[x]
+            domains[x] = [value for i, value in enumerate(values) if bits >> i & 1]
+        return domains
+
+    # returns true if and only if the domain of xi was revised
+    def revise(self, xi: object, xj: object) -> bool:
+        return self.revise_index(self.arc_index[(xi, xj)])
+
+    def revise_index(self, index: int) -> bool:
+        xi, xj = self.arc_list[index]
+        checks = self.arc_checks[index]
+        xi_values = self.values[xi]
+        xj_values = self.values[xj]
+        xj_bits = self.bits[xj]
+        xi_bits = self.bits[xi]
+        support = self.support[index] if self.support is not None else None
+
+        remaining = xi_bits
+        while remaining:
+            bit = remaining & -remaining
+            remaining ^= bit
+            a = bit.bit_length() - 1
+
+            if support is not None:
+                b = support[a]
+                if b >= 0 and xj_bits >> b & 1:
+                    continue  # the cached support is still in the domain of xj
+
+            x = xi_values[a]
+            candidates = xj_bits
+            found = -1
+            while candidates:
+                bit_b = candidates & -candidates
+                candidates ^= bit_b
+                b = bit_b.bit_length() - 1
+                y = xj_values[b]
+                for check_function in checks:
+                    if check_function(x, y):
+                        found = b
+                        break
+                if found >= 0:
+                    break
+
+            if found < 0:
+                # delete x from the domain of xi
+                xi_bits ^= bit
+            elif support is not None:
+                support[a] = found
+
+        if self.stats is not None:
+            self.stats.revise((self.bits[xi] ^ xi_bits).bit_count())
+        if xi_bits == self.bits[xi]:
+            return False
+        self.trail.append((xi, self.bits[xi]))
+        self.bits[xi] = xi_bits
+        return True
@@ -1,42 +1,65 @@
 import numpy as np
 import copy
+import time
 
 
 def allDifferent_column(queens):
     return len(queens) == len(np.unique(queens))
 
 def consistent_diagonal(queens):
-    # Quens are placed diagonally if the difference between their indexes is equal to the difference between their values
-    for i in range(len(queens)):
-        for j in range(i + 1, len(queens)):
-            if abs(i - j) == abs(queens[i] - queens[j]):
-                return False
+    # Quens are placed diagonally if the difference between their indexes is equal to the difference between their values,
+    # i.e. two queens share a diagonal if they have the same row + column or row - column
+    queens = np.asarray(queens, dtype=np.int64)
+    if len(queens) == 0:
+        return True
+    rows = np.arange(len(queens))
+    for diagonals in (queens + rows, queens - rows):
+        if np.bincount(diagonals - diagonals.min()).max() > 1:
+            return False
     return True
 
 def nqueens_satisfied(queens):
-    return allDifferent_column(queens) and consistent_diagonal(queens)
+    # Vectorized, a placement of 10^6 queens is checked in a fraction of a second
+    queens = np.asarray(queens, dtype=np.int64)
+    n = len(queens)
+    if n and (queens.min() < 0 or queens.max() >= n):
+        return False
+    # Columns and diagonals are compared by counting the queens on them instead of sorting
+    return bool(np.bincount(queens, minlength=n).max(initial=0) <= 1) and consistent_diagonal(queens)
+
+# The problem is symmetric with respect to rotations and mirroring (the dihedral group D4).
+# queens[r] is the column of the queen in row r, every function returns the transformed placement.
+def row_of_column(queens, n):
+    # Inverse permutation, i-th element is the row of the queen in column i
+    rows = [0] * n
+    for row, col in enumerate(queens):
+        rows[col] = row
+    return rows
 
-# The problem is symmetric with respect to rotations and mirroring
 def rotate_90(queens, n): #clockwise
-    return [n - 1 - queens.index(i) for i in range(n)]
+    return [n - 1 - i for i in row_of_column(queens, n)]
 
 def rotate_180(queens, n):
-    return [n - 1 - i for i in queens]
+    return [n - 1 - i for i in reversed(queens)]
 
 def rotate_270(queens, n):
     return (rotate_90(rotate_180(queens, n), n))
 
-def flip_hor(queens, n):
-    return [n - i for i in queens]
+def flip_hor(queens, n): # columns mirrored
+    return [n - 1 - i for i in queens]
 
-def flip_ver(queens, n):
+def flip_ver(queens, n): # rows mirrored
     return [i for i in reversed(queens)]
 
-def flip_diag(queens, n):
-    return flip_hor(flip_ver(queens, n), n)
+def flip_diag(queens, n): # transposed along the main diagonal
+    return row_of_column(queens, n)
+
+def flip_antidiag(queens, n): # transposed along the anti-diagonal
+    return flip_diag(rotate_180(queens, n), n)
 
 
 def nqueens_symmetries(queens, n):
+    # All 8 images of the placement, some of them may coincide
     symmetries = []
     symmetries.append(queens)
     symmetries.append(rotate_90(queens, n))
@@ -45,50 +68,84 @@ def nqueens_symmetries(queens, n):
     symmetries.append(flip_hor(queens, n))
     symmetries.append(flip_ver(queens, n))
     symmetries.append(flip_diag(queens, n))
+    symmetries.append(flip_antidiag(queens, n))
     return symmetries
 
 
 def remove_col_from_row(row, col):
+    # Returns the number of removed values (0 or 1)
     if col in row:
         row.remove(col)
+        return 1
+    return 0
 
 
-def remove_cells_under_attack(domain, q, row):
+def remove_cells_under_attack(domain, q, row, n, stats=None):
+    # If stats is a SearchStats, the removed values are counted as prunes while removing them
     domain = copy.deepcopy(domain)
+    removed = 0
     for j in range(row, n):
-        remove_col_from_row(domain[j], q)  # Same column
-        remove_col_from_row(domain[j], q + (j - row))  # Diagonal attack to the right
-        remove_col_from_row(domain[j], q - (j - row))  # Diagonal attack to the left
+        removed += remove_col_from_row(domain[j], q)  # Same column
+        removed += remove_col_from_row(domain[j], q + (j - row))  # Diagonal attack to the right
+        removed += remove_col_from_row(domain[j], q - (j - row))  # Diagonal attack to the left
+    if stats is not None:
+        stats.prune(removed)
     return domain
 
 
-def bt(domain=None):
+def bt(n, domain=None, queens=None, solutions=None, stats=None):
+    # Finds all the solutions extending the queens already placed in the first rows.
+    # All the state is passed in the arguments, so several searches can run at once.
+    # stats: SearchStats recording the nodes and failures per row, the values removed
+    # by forward checking and its time, or None
+    instrumented = stats is not None
+    if instrumented and not stats.running:
+        stats.start()
+        try:
+            return bt(n, domain, queens, solutions, stats)
+        finally:
+            stats.stop()
+
     if domain is None:
         domain = {i: list(range(n)) for i in range(n)}
+    if queens is None:
+        queens = []
+    if solutions is None:
+        solutions = []
     
     row = len(queens)
+
+    if instrumented:
+        stats.node(row)
     
     if row == n:
         solutions.append(queens.copy())
-        return
+        return solutions
 
     if not domain[row]:
         # No possible positions for the current queen, backtrack
-        return
+        if instrumented:
+            stats.failure(row)
+        return solutions
 
     for q in domain[row]:
-        new_domain = remove_cells_under_attack(domain, q, row) # forward checking
+        if instrumented:
+            start = time.perf_counter()
+            new_domain = remove_cells_under_attack(domain, q, row, n, stats) # forward checking
+            stats.propagation(time.perf_counter() - start)
+        else:
+            new_domain = remove_cells_under_attack(domain, q, row, n) # forward checking
         queens.append(q)
-        bt(new_domain)
+        bt(n, new_domain, queens, solutions, stats)
         queens.pop()  # Backtrack
 
+    return solutions
+
 
 if __name__ == "__main__":
     n = 9
-    queens = []
-    solutions = []
 
-    bt()
+    solutions = bt(n)
     print(f"Found {len(solutions)} solutions for the {n}-Queens problem.")
     for solution in solutions:
         print(f'{solution} - {nqueens_satisfied(solution)}')  
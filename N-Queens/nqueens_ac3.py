@@ -1,11 +1,19 @@
 import unittest
-from AC3 import CSPSolver
+from ac3_indexed import IndexedCSPSolver
 import queue
+import sys
+import time
 from nqueens import nqueens_satisfied
+from search_stats import SearchStats, print_progress
 
-# Assuming the CSPSolver class is already defined as you provided
 
-def n_queens_with_ac3(n):
+def n_queens_with_ac3(n, incremental=True, stats=None):
+    # incremental: keep one solver for the whole search, propagate only the assigned
+    # variable and undo the domain changes on backtrack, instead of a new solver at every node.
+    # stats: SearchStats recording the nodes and failures per row, the revise calls and removed
+    # values and the time of the propagation (a node is a call of bt, or an assignment in the
+    # incremental search), or None
+    instrumented = stats is not None
     solutions = []
     queens = []
 
@@ -29,6 +37,8 @@ def n_queens_with_ac3(n):
             domain = {i: list(range(n)) for i in variables}
         
         row = len(queens)
+        if instrumented:
+            stats.node(row)
         
         if row == n:
             solutions.append(queens.copy())
@@ -36,14 +46,23 @@ def n_queens_with_ac3(n):
 
         if not domain[row]:
             # No possible positions for the current queen, backtrack
+            if instrumented:
+                stats.failure(row)
             return
 
         # Apply AC-3 to the current domains
-        csp_solver = CSPSolver(arcs, domain.copy(), constraints)
+        start = time.perf_counter() if instrumented else 0.0
+        csp_solver = IndexedCSPSolver(arcs, domain, constraints, stats=stats)
         ac3_result = csp_solver.solve()
+        if instrumented:
+            stats.propagation(time.perf_counter() - start)
+            if ac3_result:
+                stats.prune(sum(map(len, domain.values())) - sum(map(len, ac3_result.values())))
         
         if not ac3_result:
             # AC-3 detected inconsistency, backtrack
+            if instrumented:
+                stats.failure(row)
             return
         
         domain = ac3_result  # Use the reduced domains after AC-3
@@ -62,14 +81,60 @@ def n_queens_with_ac3(n):
             bt(new_domain)
             queens.pop()  # Backtrack
 
+    def bt_incremental(solver):
+        row = len(queens)
+
+        if row == n:
+            solutions.append(queens.copy())
+            return
+
+        for q in solver.current_domain(row):
+            mark = solver.mark()
+            if instrumented:
+                stats.node(row)
+                start, removals = time.perf_counter(), stats.revise_removals
+                consistent = solver.assign(row, q)  # Assign the queen and propagate only from its row
+                stats.propagation(time.perf_counter() - start)
+                stats.prune(stats.revise_removals - removals)
+                if not consistent:
+                    stats.failure(row)
+            else:
+                consistent = solver.assign(row, q)
+            if consistent:
+                queens.append(q)
+                bt_incremental(solver)
+                queens.pop()
+            solver.undo(mark)  # Backtrack
+
     # Start the backtracking process
-    bt()
+    if instrumented:
+        stats.start()
+    if incremental:
+        solver = IndexedCSPSolver(arcs, {i: list(range(n)) for i in variables}, constraints, stats=stats)
+        if solver.solve() is not None:
+            bt_incremental(solver)
+    else:
+        bt()
+    if instrumented:
+        stats.stop()
 
     return solutions
 
 if __name__ == "__main__":
     n = 8
-    solutions = n_queens_with_ac3(n)
+    for incremental in (False, True):
+        stats = SearchStats()
+        solutions = n_queens_with_ac3(n, incremental, stats)
+        print(f"{'Incremental' if incremental else 'Solver per node'}: {stats.nodes} nodes, "
+              f"{stats.revise_calls} revise calls, {stats.total_time:.2f} s")
     print(f"Found {len(solutions)} solutions for the {n}-Queens problem.")
+
+    # Full instrumentation of a larger instance, with progress reports and the stats as JSON
+    stats = SearchStats(progress=print_progress, progress_interval=2000)
+    n_queens_with_ac3(10, True, stats)
+    print(stats.summary())
+    print(f"Nodes per row: {stats.nodes_by_depth}, failures per row: {stats.failures_by_depth}")
+    stats.dump(sys.stdout)
+
     for solution in solutions:
         print(f'{solution} - {nqueens_satisfied(solution)}')
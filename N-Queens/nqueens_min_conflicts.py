@@ -0,0 +1,171 @@
+"""
+Min-conflicts (repair) search for one solution of very large N-Queens instances.
+
+The placement is a permutation (queens[r] is the column of the queen in row r), so the
+queens never share a column and a move swaps the columns of two rows. Only the diagonals
+have to be repaired, the number of queens on every diagonal is kept in two counters:
+    down - diagonal row + column, 2n - 1 of them
+    up   - diagonal row - column + n - 1, 2n - 1 of them
+A swap changes four diagonals of each of the two queens, so its effect is known in O(1).
+
+    1. greedy initial placement: row by row, the queen is swapped with a random row below
+       until it lands on two free diagonals, only the last few queens may stay attacked
+    2. repair: every attacked queen is swapped with random rows, a swap is kept if it
+       doesn't raise the number of collisions (queens on a diagonal beyond the first),
+       the swaps keeping it the same let the search move along plateaus
+    3. if the repair doesn't finish within max_steps swaps, it starts again from a new
+       random placement
+
+The attacked queens are found by NumPy over the whole board, the moves themselves are
+single updates of Python lists, which are faster than NumPy arrays for scalar access.
+n = 10^5 takes about a second, n = 10^6 about ten.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from nqueens import nqueens_satisfied
+
+# Maximal number of random rows tried for every queen of the greedy initial placement
+GREEDY_TRIES = 64
+
+# Number of random numbers drawn from the generator at once
+DRAW_BLOCK = 1 << 16
+
+
+def greedy_placement(n, rng):
+    # Random permutation with most queens on free diagonals, and the diagonal counters of it
+    queens = rng.permutation(n).tolist()
+    down = [0] * (2 * n - 1)
+    up = [0] * (2 * n - 1)
+    draws = []
+    k = 0
+    for row in range(n):
+        remaining = n - row
+        for _ in range(GREEDY_TRIES):
+            if k == len(draws):
+                draws = rng.random(DRAW_BLOCK).tolist()
+                k = 0
+            other = row + int(draws[k] * remaining)
+            k += 1
+            col = queens[other]
+            if not down[row + col] and not up[row - col + n - 1]:
+                break
+        # The last tried column is kept even if attacked, the repair takes care of it
+        queens[row], queens[other] = col, queens[row]
+        down[row + col] += 1
+        up[row - col + n - 1] += 1
+    return queens, down, up
+
+
+def attacked_rows(queens, n):
+    # Rows of the queens sharing a diagonal with another queen, by NumPy over the whole board
+    cols = np.asarray(queens, dtype=np.int64)
+    rows = np.arange(n, dtype=np.int64)
+    down = np.bincount(rows + cols, minlength=2 * n - 1)
+    up = np.bincount(rows - cols + n - 1, minlength=2 * n - 1)
+    return np.flatnonzero((down[rows + cols] > 1) | (up[rows - cols + n - 1] > 1)).tolist()
+
+
+def repair(queens, down, up, n, rng, max_steps):
+    # Swaps attacked queens with random rows until no queen is attacked.
+    # Returns the number of swaps tried, or -1 if max_steps was reached.
+    steps = 0
+    offset = n - 1
+    while True:
+        attacked = attacked_rows(queens, n)
+        if not attacked:
+            return steps
+        others = rng.integers(0, n, size=4 * len(attacked) + 16).tolist()
+        k = 0
+        for i in attacked:
+            ci = queens[i]
+            # The queen may have been freed by an earlier swap of this pass
+            while down[i + ci] > 1 or up[i - ci + offset] > 1:
+                if steps >= max_steps:
+                    return -1
+                if k == len(others):
+                    others = rng.integers(0, n, size=len(others)).tolist()
+                    k = 0
+                j = others[k]
+                k += 1
+                if j == i:
+                    continue
+                steps += 1
+                cj = queens[j]
+
+                # Collisions removed by taking the two queens off their diagonals
+                delta = 0
+                for d, counter in ((i + ci, down), (i - ci + offset, up), (j + cj, down), (j - cj + offset, up)):
+                    counter[d] -= 1
+                    if counter[d]:
+                        delta -= 1
+                # Collisions added by putting them on the swapped positions
+                for d, counter in ((i + cj, down), (i - cj + offset, up), (j + ci, down), (j - ci + offset, up)):
+                    if counter[d]:
+                        delta += 1
+                    counter[d] += 1
+
+                if delta <= 0:
+                    queens[i], queens[j] = cj, ci
+                    ci = cj
+                else:
+                    # Take the swap back
+                    for d, counter in ((i + cj, down), (i - cj + offset, up), (j + ci, down), (j - ci + offset, up)):
+                        counter[d] -= 1
+                    for d, counter in ((i + ci, down), (i - ci + offset, up), (j + cj, down), (j - cj + offset, up)):
+                        counter[d] += 1
+
+
+def min_conflicts(n, seed=None, max_steps=None, max_restarts=20, stats=None):
+    # One solution of the n-Queens problem as a NumPy array (queens[r] is the column in row r),
+    # or None if none was found in max_restarts + 1 attempts (always for n = 2 and 3).
+    # max_steps: swaps tried in one attempt before a restart, by default 20 * n + 1000.
+    # If stats is a dict, stats['steps'], stats['restarts'] and stats['initial_attacked'] (queens
+    # attacked after the greedy placement of the last attempt) are recorded.
+    if n < 0:
+        raise ValueError(f"the number of queens must not be negative, got {n}")
+    if n == 0:
+        # The empty board is solved by placing no queens
+        if stats is not None:
+            stats.update(steps=0, restarts=0, initial_attacked=0)
+        return np.zeros(0, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    if max_steps is None:
+        max_steps = 20 * n + 1000
+    total_steps = 0
+    for restart in range(max_restarts + 1):
+        queens, down, up = greedy_placement(n, rng)
+        if stats is not None:
+            stats['initial_attacked'] = len(attacked_rows(queens, n))
+        steps = repair(queens, down, up, n, rng, max_steps)
+        total_steps += steps if steps >= 0 else max_steps
+        if stats is not None:
+            stats['steps'] = total_steps
+            stats['restarts'] = restart
+        if steps >= 0:
+            return np.array(queens, dtype=np.int64)
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('n', type=int, nargs='*', default=[8, 1000, 100000, 1000000])
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    for n in args.n:
+        stats = {}
+        start = time.perf_counter()
+        queens = min_conflicts(n, seed=args.seed, stats=stats)
+        elapsed = time.perf_counter() - start
+        if queens is None:
+            print(f"{n}-Queens: no solution found in {elapsed:.2f} s")
+            continue
+        start = time.perf_counter()
+        satisfied = nqueens_satisfied(queens)
+        print(f"{n}-Queens: solution in {elapsed:.2f} s ({stats['initial_attacked']} queens attacked after "
+              f"the greedy placement, {stats['steps']} swaps, {stats['restarts']} restarts), "
+              f"verified {satisfied} in {time.perf_counter() - start:.2f} s")
+        assert satisfied
@@ -0,0 +1,137 @@
+"""
+Parallel N-Queens search.
+
+The search tree is split into independent subproblems by fixing the queens of the first
+depth rows (a prefix). The prefixes are handed out to a process pool in small chunks,
+so a worker that finishes early just takes the next chunk and no worker idles while
+others still have big subtrees to search. The workers don't share any state, every
+subproblem is solved by a reentrant solver from its prefix.
+
+Usage:
+    python nqueens_parallel.py 14 --processes 32
+"""
+import argparse
+import os
+import time
+from multiprocessing import Pool
+
+from nqueens import bt, nqueens_satisfied, remove_cells_under_attack
+from nqueens_bitboard import bitboard_count_prefix, bitboard_solutions
+from search_stats import SearchStats
+
+
+def prefixes(n, depth, first_columns=None):
+    # All the placements of queens in the first depth rows that don't attack each other,
+    # in the order in which the search would visit them
+    full = (1 << n) - 1
+    first_free = full
+    if first_columns is not None:
+        first_free &= sum(1 << q for q in set(first_columns))
+    result = []
+
+    def extend(queens, cols, right, left):
+        if len(queens) == depth:
+            result.append(tuple(queens))
+            return
+        free = full & ~(cols | right | left)
+        if not queens:
+            free &= first_free
+        while free:
+            bit = free & -free
+            free ^= bit
+            extend(queens + [bit.bit_length() - 1], cols | bit, ((right | bit) << 1) & full, (left | bit) >> 1)
+
+    extend([], 0, 0, 0)
+    return result
+
+
+def default_depth(n, processes, first_columns=None):
+    # Smallest depth giving enough subproblems to keep all the workers busy till the end,
+    # counted over the prefixes actually searched (first_columns as in prefixes())
+    depth = 1
+    while depth < n and len(prefixes(n, depth, first_columns)) < 32 * processes:
+        depth += 1
+    return depth
+
+
+def _count_prefix(args):
+    n, prefix = args
+    stats = SearchStats()
+    count = bitboard_count_prefix(n, prefix, stats)
+    return os.getpid(), count, stats.nodes
+
+
+def _solve_prefix(args):
+    n, prefix, solver = args
+    stats = SearchStats()
+    if solver == 'bt':
+        domain = {i: list(range(n)) for i in range(n)}
+        for row, q in enumerate(prefix):
+            domain = remove_cells_under_attack(domain, q, row, n)
+        solutions = bt(n, domain, list(prefix), [], stats)
+    else:
+        solutions = list(bitboard_solutions(n, prefix=prefix, stats=stats))
+    return os.getpid(), solutions, stats.nodes
+
+
+def parallel_count(n, processes=None, depth=None, chunksize=4):
+    # Number of solutions and a dict of the number of nodes searched by each worker (by pid).
+    # Only the prefixes in the left half of the first row are searched, the right half mirrors them.
+    processes = processes or os.cpu_count()
+    if n <= 1:
+        return 1, {}
+    # The left half of the first row and the middle column are the columns searched
+    depth = min(depth or default_depth(n, processes, range((n + 1) // 2)), n)
+    left = prefixes(n, depth, first_columns=range(n // 2))
+    middle = prefixes(n, depth, first_columns=[n // 2]) if n % 2 == 1 else []
+    weights = [2] * len(left) + [1] * len(middle)
+
+    total = 0
+    worker_nodes = {}
+    with Pool(processes) as pool:
+        # Results come in the order of the prefixes, so they can be matched with the weights
+        tasks = [(n, prefix) for prefix in left + middle]
+        for weight, (pid, count, nodes) in zip(weights, pool.imap(_count_prefix, tasks, chunksize)):
+            total += weight * count
+            worker_nodes[pid] = worker_nodes.get(pid, 0) + nodes
+    return total, worker_nodes
+
+
+def parallel_solutions(n, processes=None, depth=None, chunksize=4, solver='bitboard', worker_nodes=None):
+    # Generator of all the solutions, in no particular order, as the workers find them.
+    # solver is 'bitboard' or 'bt'. If worker_nodes is a dict, it collects the number
+    # of nodes searched by each worker (by pid).
+    processes = processes or os.cpu_count()
+    depth = min(depth or default_depth(n, processes), n)
+    tasks = [(n, prefix, solver) for prefix in prefixes(n, depth)]
+    with Pool(processes) as pool:
+        for pid, solutions, nodes in pool.imap_unordered(_solve_prefix, tasks, chunksize):
+            if worker_nodes is not None:
+                worker_nodes[pid] = worker_nodes.get(pid, 0) + nodes
+            yield from solutions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('n', type=int)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--depth', type=int, default=None, help="number of fixed rows of a subproblem")
+    parser.add_argument('--solutions', action='store_true', help="stream the solutions instead of counting")
+    parser.add_argument('--solver', choices=['bitboard', 'bt'], default='bitboard')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.solutions:
+        worker_nodes = {}
+        count = 0
+        for solution in parallel_solutions(args.n, args.processes, args.depth, solver=args.solver,
+                                           worker_nodes=worker_nodes):
+            assert nqueens_satisfied(solution)
+            count += 1
+    else:
+        count, worker_nodes = parallel_count(args.n, args.processes, args.depth)
+    elapsed = time.perf_counter() - start
+
+    print(f"Found {count} solutions for the {args.n}-Queens problem in {elapsed:.2f} s.")
+    for pid, nodes in sorted(worker_nodes.items()):
+        print(f"Worker {pid}: {nodes} nodes")
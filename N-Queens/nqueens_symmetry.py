@@ -0,0 +1,60 @@
+"""
+Symmetry-reduced N-Queens enumeration.
+
+Every solution belongs to an orbit of the symmetry group of the board (rotations and
+mirroring, see nqueens_symmetries) of size 1, 2, 4 or 8. The orbit is represented by its
+lexicographically smallest (canonical) solution. Mirroring the columns maps a first queen
+in column q to column n - 1 - q, so the canonical solution always has its first queen
+in the left half of the first row, or in the middle column for odd n. Only that part
+of the search tree is searched, the rest of the solutions are images of the ones found.
+"""
+import time
+
+from nqueens import nqueens_symmetries
+from nqueens_bitboard import bitboard_solutions
+
+# Number of unique (fundamental) solutions, https://oeis.org/A002562
+KNOWN_UNIQUE_COUNTS = [1, 1, 0, 0, 1, 2, 1, 6, 12, 46, 92, 341, 1787, 9233]
+
+# Number of all solutions, https://oeis.org/A000170
+KNOWN_TOTAL_COUNTS = [1, 1, 0, 0, 2, 10, 4, 40, 92, 352, 724, 2680, 14200, 73712]
+
+
+def orbit(queens, n):
+    # Distinct images of the solution under the symmetry group, sorted
+    return sorted(set(tuple(symmetry) for symmetry in nqueens_symmetries(queens, n)))
+
+
+def canonical_solutions(n):
+    # Generator of the canonical solutions together with their orbits
+    for queens in bitboard_solutions(n, first_columns=range((n + 1) // 2)):
+        images = orbit(queens, n)
+        if list(images[0]) == queens:
+            yield queens, images
+
+
+def symmetric_solutions(n):
+    # Generator of all the solutions, each canonical solution expanded to its whole orbit
+    for _, images in canonical_solutions(n):
+        for image in images:
+            yield list(image)
+
+
+def symmetric_count(n):
+    # Number of all solutions and number of unique solutions
+    total = 0
+    unique = 0
+    for _, images in canonical_solutions(n):
+        total += len(images)
+        unique += 1
+    return total, unique
+
+
+if __name__ == "__main__":
+    # The counts are compared with OEIS here up to n = 13, test_nqueens_symmetry.py checks the smaller ones
+    for n in range(len(KNOWN_UNIQUE_COUNTS)):
+        start = time.perf_counter()
+        total, unique = symmetric_count(n)
+        known = (total, unique) == (KNOWN_TOTAL_COUNTS[n], KNOWN_UNIQUE_COUNTS[n])
+        print(f"{n}-Queens: {total} solutions, {unique} unique in {time.perf_counter() - start:.2f} s"
+              f"{'' if known else ' - DIFFERS FROM OEIS'}")
@@ -0,0 +1,125 @@
+"""
+Opt-in instrumentation of the backtracking searches.
+
+A SearchStats object is passed to a solver as its `stats` argument and the solver
+reports into it. Without it (stats=None, the default) the solvers only test
+`stats is not None` at a node, so the instrumentation costs next to nothing.
+Every solver takes a SearchStats or None, there is no other kind of stats.
+
+Recorded:
+    - nodes and failures (dead ends) per depth of the search
+    - prunes: values removed from the domains by forward checking or propagation
+    - revise calls and the values they removed (AC-3)
+    - time spent in the propagation and the total time between start() and stop(),
+      the rest of the total is the search itself
+The progress callback is called with the stats every `progress_interval` nodes,
+to_dict() / dump() give the stats as JSON.
+"""
+import json
+import time
+
+
+class SearchStats:
+    def __init__(self, progress=None, progress_interval: int = 10000):
+        self.nodes_by_depth = []
+        self.failures_by_depth = []
+        self.prunes = 0
+        self.revise_calls = 0
+        self.revise_removals = 0
+        self.propagation_time = 0.0
+        self.total_time = 0.0
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self._nodes = 0
+        self._started = None
+
+    @property
+    def nodes(self) -> int:
+        return self._nodes
+
+    @property
+    def failures(self) -> int:
+        return sum(self.failures_by_depth)
+
+    @property
+    def running(self) -> bool:
+        return self._started is not None
+
+    @property
+    def search_time(self) -> float:
+        return self.total_time - self.propagation_time
+
+    def start(self):
+        self._started = time.perf_counter()
+
+    def stop(self):
+        if self._started is not None:
+            self.total_time += time.perf_counter() - self._started
+            self._started = None
+
+    def node(self, depth: int, count: int = 1):
+        # count nodes at the depth, more than one for the solvers expanding a whole level at once
+        nodes_by_depth = self.nodes_by_depth
+        while len(nodes_by_depth) <= depth:
+            nodes_by_depth.append(0)
+        nodes_by_depth[depth] += count
+        before = self._nodes
+        self._nodes += count
+        if self.progress is not None and self._nodes // self.progress_interval != before // self.progress_interval:
+            self.progress(self)
+
+    def failure(self, depth: int):
+        failures_by_depth = self.failures_by_depth
+        while len(failures_by_depth) <= depth:
+            failures_by_depth.append(0)
+        failures_by_depth[depth] += 1
+
+    def prune(self, removed: int = 1):
+        self.prunes += removed
+
+    def revise(self, removed: int):
+        # One revise call which removed `removed` values
+        self.revise_calls += 1
+        self.revise_removals += removed
+
+    def propagation(self, seconds: float):
+        self.propagation_time += seconds
+
+    def elapsed(self) -> float:
+        # Time since start() including the running measurement, for the progress callbacks
+        if self._started is None:
+            return self.total_time
+        return self.total_time + time.perf_counter() - self._started
+
+    def to_dict(self) -> dict:
+        return {
+            'nodes': self.nodes,
+            'failures': self.failures,
+            'prunes': self.prunes,
+            'revise_calls': self.revise_calls,
+            'revise_removals': self.revise_removals,
+            'total_time': self.total_time,
+            'propagation_time': self.propagation_time,
+            'search_time': self.search_time,
+            'nodes_by_depth': list(self.nodes_by_depth),
+            'failures_by_depth': list(self.failures_by_depth),
+        }
+
+    def dump(self, file, indent=1):
+        # Writes the stats as JSON to a path or an open text file
+        if isinstance(file, str):
+            with open(file, 'w') as f:
+                json.dump(self.to_dict(), f, indent=indent)
+        else:
+            json.dump(self.to_dict(), file, indent=indent)
+
+    def summary(self) -> str:
+        return (f"{self.nodes} nodes, {self.failures} failures, {self.prunes} prunes, "
+                f"{self.revise_calls} revise calls removing {self.revise_removals} values, "
+                f"{self.total_time:.3f} s ({self.propagation_time:.3f} s propagation, "
+                f"{self.search_time:.3f} s search)")
+
+
+def print_progress(stats: SearchStats):
+    # Progress callback printing the number of nodes, the deepest level reached and the time
+    print(f"{stats.nodes} nodes, depth {len(stats.nodes_by_depth) - 1}, {stats.elapsed():.1f} s")
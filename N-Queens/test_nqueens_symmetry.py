@@ -0,0 +1,47 @@
+import pytest
+
+from nqueens import nqueens_satisfied, nqueens_symmetries
+from nqueens_bitboard import bitboard_solutions
+from nqueens_symmetry import (KNOWN_TOTAL_COUNTS, KNOWN_UNIQUE_COUNTS, canonical_solutions, orbit,
+                              symmetric_count, symmetric_solutions)
+
+# n = 13 takes seconds, the full table is checked by running nqueens_symmetry.py
+MAX_N = 12
+
+
+@pytest.mark.parametrize('n', range(MAX_N + 1))
+def test_counts_match_oeis(n):
+    total, unique = symmetric_count(n)
+    assert total == KNOWN_TOTAL_COUNTS[n]
+    assert unique == KNOWN_UNIQUE_COUNTS[n]
+
+
+@pytest.mark.parametrize('n', range(1, 10))
+def test_orbits_cover_all_solutions(n):
+    # The orbits together give exactly the solutions of the full search, each of them once
+    solutions = sorted(symmetric_solutions(n))
+    assert solutions == sorted(bitboard_solutions(n))
+    assert all(nqueens_satisfied(solution) for solution in solutions)
+
+
+@pytest.mark.parametrize('n', range(1, 10))
+def test_canonical_solutions_are_smallest_in_their_orbits(n):
+    for queens, images in canonical_solutions(n):
+        assert list(images[0]) == queens
+        assert len(images) in (1, 2, 4, 8)
+        assert queens[0] <= (n - 1) // 2 or n == 1
+
+
+def test_orbit_of_8_queens_solution():
+    queens = [0, 4, 7, 5, 2, 6, 1, 3]
+    images = orbit(queens, 8)
+    assert len(images) == 8
+    assert images == sorted(set(map(tuple, nqueens_symmetries(queens, 8))))
+    # Every image has the same orbit
+    assert all(orbit(list(image), 8) == images for image in images)
+
+
+def test_symmetric_solution_has_small_orbit():
+    # The only solution of 4-Queens up to symmetry is invariant under the rotation by 90 degrees
+    images = orbit([1, 3, 0, 2], 4)
+    assert images == [(1, 3, 0, 2), (2, 0, 3, 1)]
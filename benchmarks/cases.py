@@ -0,0 +1,270 @@
+"""
+Parameter sweeps of the benchmark cases of every solver in the repository.
+
+Every suite is a function taking `quick` (smaller sweeps, for a fast check) and
+returning a list of (name, params, case), see harness.py for what a case is.
+N-Queens/ and hamiltonian_cycle/ are directories of scripts importing each other
+by their module names, so they are put on sys.path here.
+"""
+import copy
+import queue
+import sys
+from pathlib import Path
+
+import networkx as nx
+import numpy as np
+
+REPOSITORY = Path(__file__).resolve().parent.parent
+for directory in ('N-Queens', 'hamiltonian_cycle'):
+    if str(REPOSITORY / directory) not in sys.path:
+        sys.path.insert(0, str(REPOSITORY / directory))
+
+from AC3 import CSPSolver  # noqa: E402
+from ac3_indexed import IndexedCSPSolver  # noqa: E402
+from hamiltonian_cycle import find_hamiltonian_cycles  # noqa: E402
+from held_karp import count_hamiltonian_cycles, find_hamiltonian_cycle  # noqa: E402
+from nqueens import bt  # noqa: E402
+from nqueens_ac3 import n_queens_with_ac3  # noqa: E402
+from nqueens_bitboard import bitboard_count  # noqa: E402
+from pruned_search import hamiltonian_cycles, random_hamiltonian_graph  # noqa: E402
+from search_stats import SearchStats  # noqa: E402
+
+from csp.problems import nqueens_csp, solve_hamiltonian, solve_nqueens  # noqa: E402
+from roomba.benchmark_potential import random_grid  # noqa: E402
+from roomba.roomba_path import climb_hill, climb_hill_fast, roomba_path  # noqa: E402
+from roomba.tour_planner import planned_path  # noqa: E402
+from sudoku.dlx import get_solver, random_puzzle  # noqa: E402
+from sudoku.solver import iter_solutions, parse_grid  # noqa: E402
+
+SUDOKU_PUZZLES = [
+    "530070000600195000098000060800060003400803001700020006060000280000419005000080079",
+    "800000000003600000070090200050007000000045700000100030001000068008500010090000400",
+    "000000010400000000020000000000050407008000300001090000300400200050100000000806000",
+]
+
+
+def nqueens_suite(quick):
+    cases = []
+    for n in (range(4, 8) if quick else range(4, 10)):
+        def bt_case(n=n):
+            stats = SearchStats()
+            bt(n, stats=stats)
+            return stats.nodes
+        cases.append((f"bt n={n}", {'n': n}, bt_case))
+
+    for n in (range(4, 7) if quick else range(4, 9)):
+        for incremental in (False, True):
+            def ac3_case(n=n, incremental=incremental):
+                stats = SearchStats()
+                n_queens_with_ac3(n, incremental, stats)
+                return stats.nodes
+            cases.append((f"n_queens_with_ac3 n={n} incremental={incremental}",
+                          {'n': n, 'incremental': incremental}, ac3_case))
+
+    for n in ((8, 10) if quick else (8, 10, 12, 13)):
+        cases.append((f"bitboard_count n={n}", {'n': n}, lambda n=n: bitboard_count(n)))
+    return cases
+
+
+def ac3_suite(quick):
+    # One propagation of the N-Queens CSP with the first queen placed, by both engines
+    cases = []
+    for n in ((6, 8) if quick else (6, 8, 10, 12)):
+        arcs, domains, constraints = nqueens_csp(n)
+        domains[0] = [n // 3]
+
+        def original_case(arcs=arcs, domains=domains, constraints=constraints):
+            CSPSolver.worklist = queue.Queue()  # The worklist is shared by all the instances, start empty
+            CSPSolver(arcs, copy.deepcopy(domains), constraints).solve()
+            return None  # No counters in AC3.CSPSolver
+
+        def indexed_case(arcs=arcs, domains=domains, constraints=constraints):
+            stats = SearchStats()
+            IndexedCSPSolver(arcs, domains, constraints, stats=stats).solve()
+            return stats.revise_calls
+
+        cases.append((f"CSPSolver n={n}", {'n': n}, original_case))
+        cases.append((f"IndexedCSPSolver n={n}", {'n': n}, indexed_case))
+    return cases
+
+
+def csp_suite(quick):
+    cases = []
+    configurations = {
+        'static/fc': dict(variable_order='static', value_order='static', propagation='fc'),
+        'mrv_degree/lcv/mac': dict(variable_order='mrv_degree', value_order='lcv', propagation='mac'),
+    }
+    for name, options in configurations.items():
+        for n in ((8,) if quick else (8, 10)):
+            def count_case(n=n, options=options):
+                return solve_nqueens(n, 'count', **options)[1].nodes
+            cases.append((f"CSPSearch queens count n={n} {name}", {'n': n, **options}, count_case))
+
+        for nodes in ((10,) if quick else (10, 12)):
+            G = nx.to_dict_of_lists(nx.erdos_renyi_graph(nodes, 0.4, seed=nodes))
+
+            def hamiltonian_case(G=G, options=options):
+                return solve_hamiltonian(G, 'count', **options)[1].nodes
+            cases.append((f"CSPSearch hamiltonian count nodes={nodes} {name}",
+                          {'nodes': nodes, 'density': 0.4, **options}, hamiltonian_case))
+    return cases
+
+
+def hamiltonian_suite(quick):
+    cases = []
+    for nodes in ((8, 9) if quick else (8, 9, 10, 11)):
+        for density in (0.3, 0.6):
+            G = nx.to_dict_of_lists(nx.erdos_renyi_graph(nodes, density, seed=nodes))
+            params = {'nodes': nodes, 'density': density}
+            cases.append((f"find_hamiltonian_cycles nodes={nodes} density={density}", params,
+                          lambda G=G: len(find_hamiltonian_cycles(G))))
+            cases.append((f"pruned count nodes={nodes} density={density}", params,
+                          lambda G=G: _pruned_count_nodes(G)))
+
+    for nodes in ((12, 16) if quick else (12, 16, 20)):
+        G = nx.to_dict_of_lists(nx.erdos_renyi_graph(nodes, 0.3, seed=nodes))
+        params = {'nodes': nodes, 'density': 0.3}
+        cases.append((f"held_karp exists nodes={nodes}", params, lambda G=G: _held_karp_find(G)))
+        cases.append((f"held_karp count nodes={nodes}", params, lambda G=G: _held_karp_count(G)))
+
+    for nodes in ((60,) if quick else (60, 80, 100)):
+        G = random_hamiltonian_graph(nodes, nodes // 2, seed=nodes)
+        cases.append((f"pruned first cycle nodes={nodes} extra_edges={nodes // 2}",
+                      {'nodes': nodes, 'extra_edges': nodes // 2}, lambda G=G: _pruned_first_nodes(G)))
+    return cases
+
+
+def _held_karp_find(G):
+    find_hamiltonian_cycle(G)
+    return None  # No search nodes, the table always has 2^(n-1) entries
+
+
+def _held_karp_count(G):
+    count_hamiltonian_cycles(G, memory_bounded=True)
+    return None
+
+
+def _pruned_count_nodes(G):
+    stats = {}
+    hamiltonian_cycles(G, count_only=True, stats=stats)
+    return stats['nodes']
+
+
+def _pruned_first_nodes(G):
+    stats = {}
+    next(hamiltonian_cycles(G, stats=stats), None)
+    return stats['nodes']
+
+
+def roomba_suite(quick):
+    cases = []
+    for size in ((30, 60) if quick else (30, 60, 120)):
+        for num_sources in (8, 32):
+            grid = random_grid((size, size), num_sources, allow_diagonal=True)
+            params = {'size': size, 'sources': num_sources}
+
+            def mask_case(grid=grid):
+                grid.initialize_potential_mask()
+                return None
+
+            def field_case(grid=grid):
+                grid.compute_potential()
+                return None
+
+            def roomba_case(grid=grid, size=size):
+                sources = dict(grid.sources)
+                try:
+                    return len(roomba_path((0, 0), grid, log=None)) - 1  # Steps of the roomba
+                except RuntimeError:
+                    return None  # Stuck in a local maximum
+                finally:
+                    grid.sources = sources
+
+            def climb_case(grid=grid, size=size):
+                grid.potential = None  # Point-wise potential, as in roomba.ipynb
+                return len(climb_hill((size - 1, size - 1), grid)) - 1
+
+            def climb_fast_case(grid=grid, size=size):
+                grid.compute_potential()
+                return len(climb_hill_fast((size - 1, size - 1), grid)) - 1
+
+            cases.append((f"PotentialGrid.initialize_potential_mask size={size} sources={num_sources}",
+                          params, mask_case))
+            cases.append((f"PotentialGrid.compute_potential size={size} sources={num_sources}", params, field_case))
+            cases.append((f"roomba_path size={size} sources={num_sources}", params, roomba_case))
+            cases.append((f"climb_hill size={size} sources={num_sources}", params, climb_case))
+            cases.append((f"climb_hill_fast size={size} sources={num_sources}", params, climb_fast_case))
+            cases.append((f"planned_path size={size} sources={num_sources}", params,
+                          lambda grid=grid: len(planned_path((0, 0), grid)) - 1))
+
+    # Room with obstacles, every litter has its own geodesic field and only a part of them is cached
+    size, num_sources = (300, 64) if quick else (1000, 64)
+    grid = random_grid((size, size), num_sources, allow_diagonal=True)
+    grid.occupancy = np.random.default_rng(0).random((size, size)) < 0.2
+    grid.initialize_potential_mask()
+    sources = dict(grid.sources)
+
+    def geodesic_case(grid=grid, sources=sources):
+        grid.source_fields.clear()  # No field is left from the previous run
+        grid.sources = dict(sources)
+        grid.compute_potential()
+        for source_pos in list(sources)[:8]:  # Pickups of litter whose fields were dropped
+            grid.remove_source(source_pos)
+        return len(sources)  # Fields summed, the throughput is in fields per second
+    cases.append((f"PotentialGrid.compute_potential geodesic size={size} sources={num_sources}",
+                  {'size': size, 'sources': num_sources, 'obstacles': 0.2}, geodesic_case))
+    return cases
+
+
+def sudoku_suite(quick):
+    cases = []
+    for index, puzzle in enumerate(SUDOKU_PUZZLES[:2] if quick else SUDOKU_PUZZLES):
+        def sudoku_case(puzzle=puzzle):
+            stats = {}
+            for _ in iter_solutions(parse_grid(puzzle), stats):  # All solutions, checks uniqueness
+                pass
+            return stats['nodes']
+        cases.append((f"sudoku puzzle={index}", {'puzzle': puzzle}, sudoku_case))
+
+        def dlx_case(puzzle=puzzle):
+            matrix = get_solver(3).matrix
+            nodes = matrix.stats['nodes']
+            get_solver(3).count(puzzle, limit=None)
+            return matrix.stats['nodes'] - nodes
+        cases.append((f"sudoku dlx puzzle={index}", {'puzzle': puzzle}, dlx_case))
+
+    for box, blanks in ((4, 0.6), (5, 0.4)) if quick else ((4, 0.6), (4, 0.75), (5, 0.4), (5, 0.8)):
+        puzzle = random_puzzle(box, blanks, seed=0)
+
+        def dlx_large_case(box=box, puzzle=puzzle):
+            matrix = get_solver(box).matrix
+            nodes = matrix.stats['nodes']
+            get_solver(box).solve(puzzle)
+            return matrix.stats['nodes'] - nodes
+        cases.append((f"sudoku dlx size={box * box} blanks={blanks}", {'box': box, 'blanks': blanks}, dlx_large_case))
+
+    rng = np.random.default_rng(0)
+    solved = next(iter_solutions(parse_grid(SUDOKU_PUZZLES[0])))
+    batch = []
+    for _ in range(50 if quick else 200):
+        cells = list(solved)
+        for cell in rng.choice(81, 50, replace=False):
+            cells[cell] = 0
+        batch.append(cells)
+
+    def batch_case(batch=batch):
+        for cells in batch:
+            next(iter_solutions(cells))
+        return len(batch)  # Puzzles, the throughput is in puzzles per second
+    cases.append((f"sudoku batch puzzles={len(batch)}", {'puzzles': len(batch), 'blanks': 50}, batch_case))
+    return cases
+
+
+SUITES = {
+    'nqueens': nqueens_suite,
+    'ac3': ac3_suite,
+    'csp': csp_suite,
+    'hamiltonian': hamiltonian_suite,
+    'roomba': roomba_suite,
+    'sudoku': sudoku_suite,
+}
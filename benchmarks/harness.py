@@ -0,0 +1,45 @@
+"""
+Measuring of one benchmark case.
+
+A case is a function without arguments returning the amount of work it did: the
+number of search nodes (or other items, e.g. solved puzzles or climbing steps), or
+None if the solver doesn't count anything. The case is run `repeat` times and the
+fastest run is kept, then once more under tracemalloc for the peak memory, so the
+tracing doesn't slow down the timed runs.
+"""
+import time
+import tracemalloc
+
+
+def measure(case, repeat: int = 3):
+    """
+    Runs a benchmark case.
+
+    Args:
+        case (callable): The case, returning the number of nodes it explored or None.
+        repeat (int): Number of timed runs.
+
+    Returns:
+        dict: wall_time (s, the fastest run), peak_memory (bytes allocated at most at once
+            by Python and NumPy), nodes (the result of the case) and throughput (nodes per second).
+    """
+    wall_time = float('inf')
+    nodes = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        nodes = case()
+        wall_time = min(wall_time, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        case()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'wall_time': wall_time,
+        'peak_memory': peak_memory,
+        'nodes': nodes,
+        'throughput': nodes / wall_time if nodes is not None and wall_time > 0 else None,
+    }
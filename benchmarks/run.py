@@ -0,0 +1,139 @@
+"""
+Runs the benchmark suites and compares the results of two runs.
+
+Usage (from the root of the repository):
+    python -m benchmarks.run run --output results.json
+    python -m benchmarks.run run --suite nqueens roomba --quick --output quick.json
+    python -m benchmarks.run compare old.json new.json --threshold 0.2
+
+The results file is JSON with the environment of the run and one record per case:
+suite, case, params, wall_time (s), peak_memory (bytes), nodes and throughput (nodes/s).
+compare matches the cases by suite and name and flags the ones whose wall time or peak
+memory grew by more than the threshold (relative), it exits with 1 if there is any.
+"""
+import argparse
+import datetime
+import json
+import logging
+import platform
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.cases import SUITES
+from benchmarks.harness import measure
+
+logger = logging.getLogger(__name__)
+
+# Wall times under this many seconds are too noisy to be compared
+MIN_COMPARED_TIME = 1e-3
+
+
+def run_suites(suites, quick: bool = False, repeat: int = 3, pattern: str = None):
+    """
+    Runs the benchmark cases of the given suites.
+
+    Args:
+        suites (list): Names of the suites, see benchmarks.cases.SUITES.
+        quick (bool): If True, the smaller sweeps are run.
+        repeat (int): Number of timed runs of every case.
+        pattern (str): If given, only the cases whose name contains it are run.
+
+    Returns:
+        dict: The results, see the module docstring.
+    """
+    results = []
+    for suite in suites:
+        for name, params, case in SUITES[suite](quick):
+            if pattern is not None and pattern not in name:
+                continue
+            record = {'suite': suite, 'case': name, 'params': params, **measure(case, repeat)}
+            results.append(record)
+            logger.info("%-12s %-70s %10.4f s %10.1f MB %s", suite, name, record['wall_time'],
+                        record['peak_memory'] / 2 ** 20,
+                        f"{record['throughput']:.0f} nodes/s" if record['throughput'] is not None else "")
+    return {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'quick': quick,
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def compare_results(old: dict, new: dict, threshold: float = 0.2):
+    """
+    Compares two results of run_suites.
+
+    Args:
+        old (dict): The baseline results.
+        new (dict): The results to check.
+        threshold (float): Relative growth of the wall time or peak memory counted as a regression.
+
+    Returns:
+        list: One tuple (suite, case, metric, old value, new value, ratio, regression) for every
+            metric of every case in both results.
+    """
+    old_records = {(record['suite'], record['case']): record for record in old['results']}
+    rows = []
+    for record in new['results']:
+        key = (record['suite'], record['case'])
+        if key not in old_records:
+            continue
+        for metric in ('wall_time', 'peak_memory'):
+            old_value, new_value = old_records[key][metric], record[metric]
+            if not old_value:
+                continue
+            ratio = new_value / old_value
+            noisy = metric == 'wall_time' and max(old_value, new_value) < MIN_COMPARED_TIME
+            rows.append((*key, metric, old_value, new_value, ratio, not noisy and ratio > 1 + threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="run the benchmarks")
+    run_parser.add_argument('--suite', nargs='+', choices=list(SUITES), default=list(SUITES))
+    run_parser.add_argument('--case', help="run only the cases whose name contains this")
+    run_parser.add_argument('--quick', action='store_true', help="smaller parameter sweeps")
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--output', default='benchmark_results.json')
+
+    compare_parser = commands.add_parser('compare', help="compare two results files")
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=0.2,
+                                help="relative growth counted as a regression (default 0.2 = 20 %%)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.command == 'run':
+        start = time.perf_counter()
+        results = run_suites(args.suite, args.quick, args.repeat, args.case)
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=1)
+        logger.info("%d cases in %.1f s written to %s", len(results['results']), time.perf_counter() - start,
+                    args.output)
+        return
+
+    with open(args.old) as file:
+        old = json.load(file)
+    with open(args.new) as file:
+        new = json.load(file)
+    rows = compare_results(old, new, args.threshold)
+    regressions = [row for row in rows if row[-1]]
+    for suite, case, metric, old_value, new_value, ratio, regression in rows:
+        logger.info("%s %-12s %-70s %-11s %12.4g -> %12.4g (%.2fx)", '!' if regression else ' ', suite, case,
+                    metric, old_value, new_value, ratio)
+    logger.info("%d regressions in %d compared metrics", len(regressions), len(rows))
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+N-Queens and Hamiltonian cycle expressed as binary CSPs for CSPSearch.
+
+Usage (from the root of the repository):
+    python -m csp.problems
+"""
+from csp.search import CSPSearch, SearchStats
+
+
+def nqueens_csp(n):
+    # Variable i is the column of the queen in row i, the same model as N-Queens/nqueens_ac3.py
+    domains = {i: list(range(n)) for i in range(n)}
+    arcs = []
+    constraints = {}
+    for i in range(n):
+        for j in range(n):
+            if i != j:
+                arcs.append((i, j))
+
+                def constraint(x, y, i=i, j=j):
+                    return x != y and abs(x - y) != abs(i - j)
+                constraints[(i, j)] = constraint
+    return arcs, domains, constraints
+
+
+def solve_nqueens(n, mode='all', limit=None, stats=None, **options):
+    # Solutions as lists of columns (by row), or the number of solutions for mode='count'.
+    # options are passed to CSPSearch, the search reports into stats (a new SearchStats if None),
+    # returns (result, stats).
+    if stats is None:
+        stats = SearchStats()
+    search = CSPSearch(*nqueens_csp(n), stats=stats, **options)
+    result = search.solve(mode, limit)
+    if mode == 'first':
+        result = [result[i] for i in range(n)] if result is not None else None
+    elif mode == 'all':
+        result = [[solution[i] for i in range(n)] for solution in result]
+    return result, stats
+
+
+def hamiltonian_csp(G):
+    # Variable i is the i-th node of the cycle, the same model as hamiltonian_cycle.py:
+    #   x_0 = the first node of G (start node)
+    #   allDifferent(x_0, ..., x_{n-1}), as x_i != x_j for every pair
+    #   (x_i, x_{i+1}) in E, and (x_{n-1}, x_0) in E to close the cycle
+    nodes = list(G)
+    n = len(nodes)
+    neighbors = {node: set(G[node]) for node in nodes}
+    domains = {i: list(nodes) for i in range(n)}
+    if n:
+        domains[0] = [nodes[0]]
+
+    arcs = []
+    constraints = {}
+    for i in range(n):
+        for j in range(n):
+            if i == j:
+                continue
+            arcs.append((i, j))
+            if n > 1 and (j == (i + 1) % n or i == (j + 1) % n):
+                def constraint(x, y):
+                    return x != y and y in neighbors[x]
+            else:
+                def constraint(x, y):
+                    return x != y
+            constraints[(i, j)] = constraint
+    return arcs, domains, constraints
+
+
+def solve_hamiltonian(G, mode='all', limit=None, stats=None, **options):
+    # Cycles as lists of nodes starting and ending in the first node of G (as in hamiltonian_cycle.py),
+    # or the number of cycles for mode='count'. Every cycle is found in both directions.
+    # options are passed to CSPSearch, the search reports into stats (a new SearchStats if None),
+    # returns (result, stats).
+    n = len(G)
+    if n < 3:
+        raise ValueError("A Hamiltonian cycle needs at least 3 nodes")
+    if stats is None:
+        stats = SearchStats()
+    search = CSPSearch(*hamiltonian_csp(G), stats=stats, **options)
+    result = search.solve(mode, limit)
+
+    def cycle(solution):
+        return [solution[i] for i in range(n)] + [solution[0]]
+
+    if mode == 'first':
+        result = cycle(result) if result is not None else None
+    elif mode == 'all':
+        result = [cycle(solution) for solution in result]
+    return result, stats
+
+
+def _report(name, stats):
+    print(f"{name:>30}: {stats.nodes:>8} nodes, {stats.failures:>7} failures, "
+          f"{stats.revise_calls:>9} revise calls, {stats.total_time:.2f} s")
+
+
+if __name__ == "__main__":
+    import networkx as nx
+
+    configurations = [
+        dict(variable_order='static', value_order='static', propagation='fc'),
+        dict(variable_order='static', value_order='static', propagation='mac'),
+        dict(variable_order='mrv', value_order='static', propagation='fc'),
+        dict(variable_order='mrv_degree', value_order='lcv', propagation='fc'),
+        dict(variable_order='mrv_degree', value_order='lcv', propagation='mac'),
+    ]
+
+    def name(options):
+        return f"{options['variable_order']}/{options['value_order']}/{options['propagation']}"
+
+    n = 8
+    print(f"All solutions of the {n}-Queens problem")
+    for options in configurations:
+        count, stats = solve_nqueens(n, 'count', **options)
+        assert count == 92
+        _report(name(options), stats)
+
+    n = 20
+    print(f"First solution of the {n}-Queens problem")
+    for options in configurations:
+        solution, stats = solve_nqueens(n, 'first', **options)
+        _report(name(options), stats)
+
+    G = nx.to_dict_of_lists(nx.erdos_renyi_graph(12, 0.4, seed=1))
+    print("All Hamiltonian cycles of a random graph with 12 nodes")
+    for options in configurations:
+        cycles, stats = solve_hamiltonian(G, 'count', **options)
+        _report(f"{name(options)} ({cycles} cycles)", stats)
@@ -0,0 +1,168 @@
+"""
+Backtracking search for binary CSPs.
+
+The problem is given in the same model as AC3.CSPSolver in N-Queens/:
+    arcs        - list of tuples (xi, xj)
+    domains     - dict of { variable: list }
+    constraints - dict of { tuples: function }, the first two items of the key are the arc,
+                  several constraints on one arc are alternatives
+
+The search is built on IndexedCSPSolver (N-Queens/ac3_indexed.py): the domains are kept
+as bitsets over the indexes of the initial values, the revisions use its arc indexes and
+residual supports and every change is recorded on its undo trail, so the search doesn't
+copy any domains. The search can be configured with:
+    variable_order - 'static' (in the order of domains), 'mrv' (smallest domain first)
+                     or 'mrv_degree' (smallest domain, ties broken by the most constraints
+                     to unassigned variables)
+    value_order    - 'static' or 'lcv' (the value removing the fewest values of the
+                     unassigned neighbours first)
+    propagation    - 'fc' (forward checking, the neighbours of the assigned variable only)
+                     or 'mac' (AC-3 after every assignment)
+"""
+import sys
+import time
+from pathlib import Path
+
+# N-Queens/ is a directory of scripts importing each other by their module names
+N_QUEENS = str(Path(__file__).resolve().parent.parent / 'N-Queens')
+if N_QUEENS not in sys.path:
+    sys.path.insert(0, N_QUEENS)
+
+from ac3_indexed import IndexedCSPSolver  # noqa: E402
+from search_stats import SearchStats  # noqa: E402,F401 (for the users of the search)
+
+VARIABLE_ORDERS = ('static', 'mrv', 'mrv_degree')
+VALUE_ORDERS = ('static', 'lcv')
+PROPAGATIONS = ('fc', 'mac')
+MODES = ('first', 'all', 'count')
+
+
+class CSPSearch(IndexedCSPSolver):
+    # arcs: list of tuples
+    # domains: dict of { variable: list }
+    # constraints: dict of { tuples: function }
+    # stats: SearchStats (search_stats.py) recording the nodes and failures per depth, the revise
+    # calls, the removed values and the time of the propagation, or None
+    def __init__(self, arcs: list, domains: dict, constraints: dict, variable_order: str = 'mrv_degree',
+                 value_order: str = 'lcv', propagation: str = 'mac', stats=None):
+        if variable_order not in VARIABLE_ORDERS:
+            raise ValueError(f"Unknown variable order {variable_order!r}, use one of {VARIABLE_ORDERS}")
+        if value_order not in VALUE_ORDERS:
+            raise ValueError(f"Unknown value order {value_order!r}, use one of {VALUE_ORDERS}")
+        if propagation not in PROPAGATIONS:
+            raise ValueError(f"Unknown propagation {propagation!r}, use one of {PROPAGATIONS}")
+        super().__init__(arcs, domains, constraints, stats=stats)
+        self.variable_order = variable_order
+        self.value_order = value_order
+        self.propagation = propagation
+
+        self.variables = list(domains)
+        self.assigned = {}
+
+    # Propagates the assignment of x, returns False if a domain is wiped out
+    def propagate_assignment(self, x: object) -> bool:
+        assigned = self.assigned
+        arcs_into = (index for index in self.arcs_into.get(x, ()) if self.arc_list[index][0] not in assigned)
+        if self.propagation == 'fc':
+            for index in arcs_into:
+                if self.revise_index(index) and not self.bits[self.arc_list[index][0]]:
+                    return False
+            return True
+
+        self.enqueue(arcs_into)
+        return self.propagate()
+
+    def select_variable(self) -> object:
+        unassigned = [x for x in self.variables if x not in self.assigned]
+        if self.variable_order == 'static':
+            return unassigned[0]
+        if self.variable_order == 'mrv':
+            return min(unassigned, key=lambda x: self.bits[x].bit_count())
+
+        def degree(x):
+            return sum(1 for index in self.arcs_into.get(x, ()) if self.arc_list[index][0] not in self.assigned)
+        return min(unassigned, key=lambda x: (self.bits[x].bit_count(), -degree(x)))
+
+    def order_values(self, x: object) -> list:
+        values = self.current_domain(x)
+        if self.value_order == 'static' or len(values) == 1:
+            return values
+
+        # Number of values left in the unassigned neighbours after forward checking x = value
+        neighbours = [index for index in self.arcs_into.get(x, ()) if self.arc_list[index][0] not in self.assigned]
+        x_bits = self.bits[x]
+
+        def remaining(value):
+            self.bits[x] = 1 << self.values[x].index(value)
+            mark = self.mark()
+            for index in neighbours:
+                self.revise_index(index)
+            left = sum(self.bits[self.arc_list[index][0]].bit_count() for index in neighbours)
+            self.undo(mark)
+            return left
+
+        scores = {value: remaining(value) for value in values}
+        self.bits[x] = x_bits
+        return sorted(values, key=lambda value: -scores[value])
+
+    # Generator of all the solutions as dicts of { variable: value }
+    def solutions(self):
+        if len(self.assigned) == len(self.variables):
+            yield dict(self.assigned)
+            return
+
+        stats = self.stats
+        depth = len(self.assigned)
+        x = self.select_variable()
+        for value in self.order_values(x):
+            mark = self.mark()
+            self.trail.append((x, self.bits[x]))
+            self.bits[x] = 1 << self.values[x].index(value)
+            self.assigned[x] = value
+            if stats is not None:
+                stats.node(depth)
+                start, removals = time.perf_counter(), stats.revise_removals
+                consistent = self.propagate_assignment(x)
+                stats.propagation(time.perf_counter() - start)
+                stats.prune(stats.revise_removals - removals)
+                if not consistent:
+                    stats.failure(depth)
+            else:
+                consistent = self.propagate_assignment(x)
+            if consistent:
+                yield from self.solutions()
+            del self.assigned[x]
+            self.undo(mark)
+
+    # mode: 'first' returns the first solution (None if there is none), 'all' a list of all
+    # the solutions and 'count' the number of solutions. limit stops after that many solutions.
+    def solve(self, mode: str = 'first', limit: int = None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode {mode!r}, use one of {MODES}")
+        if mode == 'first':
+            limit = 1
+
+        if self.stats is not None:
+            self.stats.start()
+        mark = self.mark()
+        found = []
+        count = 0
+        self.enqueue(range(len(self.arc_list)))  # Initial arc consistency of the whole problem
+        if self.propagate():
+            for solution in self.solutions():
+                count += 1
+                if mode != 'count':
+                    found.append(solution)
+                if limit is not None and count >= limit:
+                    break
+        # Leave the solver as it was, a generator stopped early may not have undone its assignments
+        self.assigned.clear()
+        self.undo(mark)
+        if self.stats is not None:
+            self.stats.stop()
+
+        if mode == 'first':
+            return found[0] if found else None
+        if mode == 'all':
+            return found
+        return count
@@ -0,0 +1,66 @@
+"""
+Conversion of the supported graph inputs to the adjacency dict used by the searches.
+
+Accepted graphs:
+    - dict of { node: iterable of neighbors }
+    - networkx graph (anything with the .adj mapping of networkx), directed graphs are made undirected
+    - path (str or os.PathLike) of an edge-list file: one edge "u v" per line (space or comma
+      separated), a line with a single node adds an isolated node, '#' starts a comment.
+      Nodes that are integers are read as int, others as str.
+    - CSR adjacency: a tuple (indptr, indices) of NumPy arrays or a scipy.sparse matrix
+      (anything with .indptr and .indices), the neighbors of node i are indices[indptr[i]:indptr[i + 1]]
+"""
+import os
+
+import numpy as np
+
+
+def load_graph(graph) -> dict:
+    # Adjacency dict { node: list of neighbors } of any accepted graph, see the module docstring
+    if isinstance(graph, dict):
+        return {node: list(neighbors) for node, neighbors in graph.items()}
+    if isinstance(graph, (str, os.PathLike)):
+        return read_edge_list(graph)
+    if hasattr(graph, 'indptr') and hasattr(graph, 'indices'):
+        return from_csr(graph.indptr, graph.indices)
+    if isinstance(graph, tuple) and len(graph) == 2:
+        return from_csr(*graph)
+    if hasattr(graph, 'adj'):
+        return {node: list(graph.adj[node]) for node in graph}
+    raise TypeError(f"Unsupported graph input of the type {type(graph).__name__}")
+
+
+def _parse_node(text):
+    try:
+        return int(text)
+    except ValueError:
+        return text
+
+
+def read_edge_list(path) -> dict:
+    # Adjacency dict of an edge-list file, the nodes in the order of their first appearance
+    G = {}
+    with open(path) as file:
+        for line_number, line in enumerate(file, 1):
+            fields = line.split('#', 1)[0].replace(',', ' ').split()
+            if not fields:
+                continue
+            if len(fields) > 2:
+                raise ValueError(f"{path}:{line_number}: expected 'u v' or a single node, got {line.strip()!r}")
+            nodes = [_parse_node(field) for field in fields]
+            for node in nodes:
+                G.setdefault(node, [])
+            if len(nodes) == 2:
+                u, v = nodes
+                G[u].append(v)
+                G[v].append(u)
+    return G
+
+
+def from_csr(indptr, indices) -> dict:
+    # Adjacency dict of a CSR adjacency structure with the nodes 0, ..., n-1
+    indptr = np.asarray(indptr)
+    indices = np.asarray(indices)
+    if indptr.ndim != 1 or len(indptr) == 0 or indptr[-1] != len(indices):
+        raise ValueError("indptr must be a 1D array of n + 1 offsets ending with len(indices)")
+    return {i: indices[indptr[i]:indptr[i + 1]].tolist() for i in range(len(indptr) - 1)}
@@ -25,7 +25,17 @@ Constraints:
 """
 
 
-def find_hamiltonian_cycles():
+EXAMPLE_GRAPH = {
+    0: [1, 2, 4],
+    1: [0, 3, 4],
+    2: [0, 3],
+    3: [1, 2],
+    4: [0, 1]
+    }
+
+
+def find_hamiltonian_cycles(G=None):
+    # G: dict of { node: list of neighbors } with the nodes 0, ..., n-1, a small example graph if None
 
     def hamiltonian_cycle(G, node, visited, current_path):
         visited[node] = True
@@ -52,17 +62,8 @@ def find_hamiltonian_cycles():
 
     cycles = []
 
-    G = {
-        0: [1, 2, 4],
-        1: [0, 3, 4],
-        2: [0, 3],
-        3: [1, 2],
-        4: [0, 1]
-        }
-
-    print("Graph:")
-    for node, neighbors in G.items():
-        print(f"{node}: {neighbors}")
+    if G is None:
+        G = EXAMPLE_GRAPH
 
     nodes = list(G.keys())
 
@@ -75,6 +76,10 @@ def find_hamiltonian_cycles():
 
 
 if __name__ == '__main__':
+    print("Graph:")
+    for node, neighbors in EXAMPLE_GRAPH.items():
+        print(f"{node}: {neighbors}")
+
     cycles = find_hamiltonian_cycles()
 
     if len(cycles) == 0:
@@ -0,0 +1,209 @@
+"""
+Held-Karp dynamic programming over subsets for Hamiltonian cycles.
+
+The cycle is rooted in the first node of G (the start node). Every other node i gets
+the bit i - 1 of a subset mask. For each mask the DP keeps the set of the nodes in
+which a path from the start node through exactly the nodes of the mask can end
+(as a bitmask, for existence and reconstruction) or the number of such paths ending
+in every node (for counting). A path through mask ending in u exists if a path
+through mask without u ends in a neighbor of u, so the masks are processed in layers
+by their number of nodes and every layer is one NumPy operation per node.
+
+There is a Hamiltonian cycle if a path through all the nodes ends in a neighbor of
+the start node. O(2^n * n) operations on bitsets, O(2^n * n^2) for counting.
+Memory: the existence table has 2^(n-1) 64 bit integers (128 MB for n = 25) and the
+masks split into layers by their number of nodes take another 128 MB (256 MB while
+they are being split, the array of all masks is freed after that). The counting
+table has 2^(n-1) * (n-1) counters, with memory_bounded only two layers of it and
+of the masks are kept at once, each layer of masks is built from the previous one.
+"""
+import time
+
+import numpy as np
+
+from hamiltonian_cycle import find_hamiltonian_cycles
+
+# Number of set bits of every byte
+POPCOUNT_8 = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+# Largest number of nodes of the table, the masks are popcounted as 32 bit integers
+MAX_NODES = 32
+
+
+def _popcount(masks):
+    count = np.zeros(masks.shape, dtype=np.uint8)
+    for shift in range(0, 32, 8):
+        count += POPCOUNT_8[(masks >> shift) & 255]
+    return count
+
+
+def _adjacency_masks(G):
+    # Nodes of G in order, neighbors of every node except the start node as masks of the other
+    # nodes except the start node, and the neighbors of the start node as such a mask
+    nodes = list(G)
+    index = {node: i for i, node in enumerate(nodes)}
+    adjacency = [0] * (len(nodes) - 1)
+    start_neighbors = 0
+    for node, neighbors in G.items():
+        for neighbor in neighbors:
+            i, j = index[node], index[neighbor]
+            if i == j:
+                continue
+            if i == 0:
+                start_neighbors |= 1 << (j - 1)
+            elif j == 0:
+                start_neighbors |= 1 << (i - 1)
+            else:
+                adjacency[i - 1] |= 1 << (j - 1)
+                adjacency[j - 1] |= 1 << (i - 1)
+    return nodes, adjacency, start_neighbors
+
+
+def _layers(m):
+    # Masks of m bits grouped by the number of set bits, each group sorted
+    if m >= MAX_NODES:
+        raise ValueError(f"Held-Karp tables are limited to {MAX_NODES} nodes")
+    masks = np.arange(1 << m, dtype=np.int64)
+    popcount = _popcount(masks)
+    return [masks[popcount == k] for k in range(m + 1)]
+
+
+def _next_layer(layer, m):
+    # Sorted masks of m bits with one set bit more than the masks of the sorted layer, built
+    # without the other layers. Every new mask is a mask of layer with the bit j added above its
+    # highest set bit, so the bit j is added to the masks below 1 << j, in the order of j.
+    return np.concatenate([layer[:np.searchsorted(layer, 1 << j)] | (1 << j) for j in range(m)])
+
+
+def path_end_table(G):
+    # ends[mask] is the mask of the nodes in which a path from the start node through
+    # exactly the nodes of mask can end, see the module docstring for the numbering
+    nodes, adjacency, start_neighbors = _adjacency_masks(G)
+    m = len(nodes) - 1
+    ends = np.zeros(1 << m, dtype=np.int64)
+    layers = _layers(m)
+    for j in range(m):
+        if start_neighbors >> j & 1:
+            ends[1 << j] = 1 << j
+
+    for layer in layers[2:]:
+        for j in range(m):
+            masks = layer[(layer >> j) & 1 == 1]
+            reachable = (ends[masks ^ (1 << j)] & adjacency[j]) != 0
+            ends[masks[reachable]] |= 1 << j
+    return ends
+
+
+def hamiltonian_cycle_exists(G):
+    if len(G) < 3:
+        return False
+    _, _, start_neighbors = _adjacency_masks(G)
+    return bool(path_end_table(G)[-1] & start_neighbors)
+
+
+def find_hamiltonian_cycle(G):
+    # One Hamiltonian cycle as a list of nodes starting and ending in the start node, None if there is none
+    if len(G) < 3:
+        return None
+    nodes, adjacency, start_neighbors = _adjacency_masks(G)
+    ends = path_end_table(G)
+
+    mask = len(ends) - 1
+    candidates = int(ends[mask]) & start_neighbors
+    if not candidates:
+        return None
+
+    # Walk the table back from the full mask, each time to a neighbor in which the shorter path can end
+    path = []
+    while mask:
+        j = (candidates & -candidates).bit_length() - 1
+        path.append(j)
+        mask ^= 1 << j
+        candidates = int(ends[mask]) & adjacency[j] if mask else 0
+    return [nodes[0]] + [nodes[j + 1] for j in reversed(path)] + [nodes[0]]
+
+
+def count_hamiltonian_cycles(G, memory_bounded=False):
+    # Number of Hamiltonian cycles, each counted once (find_hamiltonian_cycles finds each in both directions).
+    # memory_bounded: keep only two layers of the table, the masks of the previous layer are found by a binary search
+    # and each layer of masks is built from the previous one, so no list of all the 2^m masks is built
+    if len(G) < 3:
+        return 0
+    nodes, adjacency, start_neighbors = _adjacency_masks(G)
+    m = len(nodes) - 1
+    degrees = [len(set(neighbors) - {node}) for node, neighbors in G.items()]
+    if min(degrees) < 2:
+        return 0
+    # A path leaves the start node to one of its neighbors and every other node to one of its
+    # neighbors except the one it came from, which bounds all the counts. If the bound doesn't
+    # fit into int64, the counts are kept as exact Python integers.
+    bound = degrees[0] * np.prod(np.array(degrees[1:], dtype=float) - 1)
+    dtype = np.int64 if bound < 2 ** 62 else object
+    neighbor_lists = [[i for i in range(m) if adjacency[j] >> i & 1] for j in range(m)]
+
+    # counts[index of mask, j] is the number of paths through mask ending in the node j
+    if memory_bounded:
+        if m >= MAX_NODES:
+            raise ValueError(f"Held-Karp tables are limited to {MAX_NODES} nodes")
+        previous_masks = _next_layer(np.zeros(1, dtype=np.int64), m)
+        counts = np.zeros((len(previous_masks), m), dtype=dtype)
+        for index, mask in enumerate(previous_masks):
+            j = int(mask).bit_length() - 1
+            counts[index, j] = start_neighbors >> j & 1
+
+        for _ in range(2, m + 1):
+            layer = _next_layer(previous_masks, m)
+            new_counts = np.zeros((len(layer), m), dtype=dtype)
+            for j in range(m):
+                selected = (layer >> j) & 1 == 1
+                previous = np.searchsorted(previous_masks, layer[selected] ^ (1 << j))
+                new_counts[selected, j] = counts[np.ix_(previous, neighbor_lists[j])].sum(axis=1)
+            previous_masks, counts = layer, new_counts
+        last = counts[0]
+    else:
+        layers = _layers(m)
+        counts = np.zeros((1 << m, m), dtype=dtype)
+        for j in range(m):
+            counts[1 << j, j] = start_neighbors >> j & 1
+
+        for layer in layers[2:]:
+            for j in range(m):
+                masks = layer[(layer >> j) & 1 == 1]
+                counts[masks, j] = counts[np.ix_(masks ^ (1 << j), neighbor_lists[j])].sum(axis=1)
+        last = counts[-1]
+
+    # Every cycle is found once in each direction
+    directed = sum(int(last[j]) for j in range(m) if start_neighbors >> j & 1)
+    return directed // 2
+
+
+def _is_hamiltonian_cycle(G, cycle):
+    return (cycle[0] == cycle[-1] and sorted(cycle[:-1]) == sorted(G) and
+            all(b in G[a] for a, b in zip(cycle, cycle[1:])))
+
+
+if __name__ == "__main__":
+    import networkx as nx
+
+    # Cross-check against the backtracking on random Erdos graphs
+    for seed in range(200):
+        n = 3 + seed % 8
+        G = nx.to_dict_of_lists(nx.erdos_renyi_graph(n, 0.5, seed=seed))
+        cycles = find_hamiltonian_cycles(G)
+        assert count_hamiltonian_cycles(G) * 2 == len(cycles)
+        assert count_hamiltonian_cycles(G, memory_bounded=True) * 2 == len(cycles)
+        assert hamiltonian_cycle_exists(G) == bool(cycles)
+        cycle = find_hamiltonian_cycle(G)
+        assert (cycle is None) == (not cycles)
+        assert cycle is None or _is_hamiltonian_cycle(G, cycle)
+    print("Held-Karp agrees with find_hamiltonian_cycles on 200 random graphs")
+
+    for n in (16, 20, 24):
+        G = nx.to_dict_of_lists(nx.erdos_renyi_graph(n, 0.3, seed=n))
+        start = time.perf_counter()
+        cycle = find_hamiltonian_cycle(G)
+        print(f"n = {n}: {'a cycle' if cycle else 'no cycle'} found in {time.perf_counter() - start:.2f} s")
+        if n <= 20:
+            start = time.perf_counter()
+            count = count_hamiltonian_cycles(G, memory_bounded=True)
+            print(f"n = {n}: {count} cycles counted in {time.perf_counter() - start:.2f} s")
@@ -0,0 +1,114 @@
+"""
+Parallel Hamiltonian cycle search.
+
+The pruned search is split into independent subproblems by fixing the beginning of
+the path (a prefix) from the start node to the given depth. The prefixes are handed
+out to a process pool in small chunks, so a worker that finishes early just takes
+the next chunk. Every worker builds the search of the graph once.
+
+    - find any cycle: the first worker to find one sets a shared cancel event, the
+      others stop their current subproblem soon after and skip the remaining ones
+    - count all cycles: the counts of the subproblems are added, every cycle extends
+      exactly one prefix, so each is counted once
+
+Usage:
+    python parallel_search.py --random 45 90 --seed 3 --processes 32
+    python parallel_search.py edges.txt --count
+"""
+import argparse
+import os
+import time
+from multiprocessing import Event, Pool
+
+from graph_input import load_graph
+from pruned_search import PrunedSearch, random_hamiltonian_graph
+
+# Search of the graph and the cancel event of a worker process, see _init_worker()
+_worker_search = None
+_worker_cancel = None
+
+
+def default_depth(search, processes):
+    # Smallest depth giving enough subproblems to keep all the workers busy till the end
+    depth = 1
+    while depth < search.n - 1 and len(search.prefixes(depth)) < 32 * processes:
+        depth += 1
+    return depth
+
+
+def _init_worker(G, cancel):
+    global _worker_search, _worker_cancel
+    _worker_search = PrunedSearch(G)
+    _worker_cancel = cancel
+
+
+def _find_in_prefix(prefix):
+    if _worker_cancel.is_set():
+        return os.getpid(), None, 0
+    nodes_before = _worker_search.stats['nodes']
+    cycle = next(_worker_search.cycles(prefix, cancel=_worker_cancel), None)
+    if cycle is not None:
+        _worker_cancel.set()
+    return os.getpid(), cycle, _worker_search.stats['nodes'] - nodes_before
+
+
+def _count_in_prefix(prefix):
+    nodes_before = _worker_search.stats['nodes']
+    count = sum(1 for _ in _worker_search.cycles(prefix, build=False))
+    return os.getpid(), count, _worker_search.stats['nodes'] - nodes_before
+
+
+def _run(graph, task, processes, depth, chunksize, worker_nodes):
+    G = load_graph(graph)
+    search = PrunedSearch(G)
+    processes = processes or os.cpu_count()
+    depth = depth or default_depth(search, processes)
+    cancel = Event()
+    with Pool(processes, initializer=_init_worker, initargs=(G, cancel)) as pool:
+        for pid, result, nodes in pool.imap_unordered(task, search.prefixes(depth), chunksize):
+            if worker_nodes is not None:
+                worker_nodes[pid] = worker_nodes.get(pid, 0) + nodes
+            yield result
+
+
+def parallel_find_cycle(graph, processes=None, depth=None, chunksize=1, worker_nodes=None):
+    # One Hamiltonian cycle of the graph (any input load_graph accepts), None if there is none.
+    # If worker_nodes is a dict, it collects the number of search nodes of each worker (by pid).
+    for cycle in _run(graph, _find_in_prefix, processes, depth, chunksize, worker_nodes):
+        if cycle is not None:
+            return cycle  # Leaving the pool terminates the workers still searching
+    return None
+
+
+def parallel_count_cycles(graph, processes=None, depth=None, chunksize=4, worker_nodes=None):
+    # Number of the Hamiltonian cycles of the graph, each counted once.
+    # If worker_nodes is a dict, it collects the number of search nodes of each worker (by pid).
+    return sum(_run(graph, _count_in_prefix, processes, depth, chunksize, worker_nodes))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('graph', nargs='?', help="edge-list file of the graph")
+    parser.add_argument('--random', type=int, nargs=2, metavar=('N', 'EXTRA'),
+                        help="random graph of N nodes with a hidden Hamiltonian cycle and EXTRA more edges")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--depth', type=int, default=None, help="number of fixed nodes after the start node")
+    parser.add_argument('--count', action='store_true', help="count all the cycles instead of finding one")
+    args = parser.parse_args()
+    if (args.graph is None) == (args.random is None):
+        parser.error("give either an edge-list file or --random")
+
+    graph = args.graph if args.graph is not None else random_hamiltonian_graph(*args.random, seed=args.seed)
+    worker_nodes = {}
+    start = time.perf_counter()
+    if args.count:
+        count = parallel_count_cycles(graph, args.processes, args.depth, worker_nodes=worker_nodes)
+        print(f"Found {count} Hamiltonian cycles in {time.perf_counter() - start:.2f} s.")
+    else:
+        cycle = parallel_find_cycle(graph, args.processes, args.depth, worker_nodes=worker_nodes)
+        print(f"{'Found a' if cycle else 'No'} Hamiltonian cycle in {time.perf_counter() - start:.2f} s.")
+        if cycle:
+            print(cycle)
+    for pid, nodes in sorted(worker_nodes.items()):
+        print(f"Worker {pid}: {nodes} search nodes")
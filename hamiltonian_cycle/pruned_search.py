@@ -0,0 +1,319 @@
+"""
+Backtracking for Hamiltonian cycles with pruning.
+
+The same search as find_hamiltonian_cycles (extend a path from the start node by an
+unvisited neighbor), but a branch is cut as soon as the rest of the graph can't be
+completed to a cycle. A node still to be visited needs two cycle edges to nodes it
+can still use: unvisited nodes, the current end of the path and the start node.
+
+    - degree: when the end of the path moves on, the old end can't be used any more,
+      so its unvisited neighbors are checked to still have two usable neighbors
+    - forced edges: an unvisited node with only two usable neighbors needs both of them.
+      Such a neighbor of the end must be visited next, two of them are a dead end,
+      and an unvisited node needed by three of them (the start node by two) too.
+    - connectivity: the unvisited nodes must all be reachable from the end of the path
+      through unvisited nodes. Checked only if the old end had another unvisited
+      neighbor, otherwise it was a leaf and its removal can't disconnect anything.
+    - fewest options first: the neighbors are tried from the one with the fewest usable neighbors
+    - each cycle once: a cycle is found only in the direction in which the second
+      node comes before the last one in the order of G, so the last node must be a
+      neighbor of the start node after the second one (a "closer")
+
+The search starts in a node of the smallest degree, a cycle goes through every node
+anyway, and it can start from a prefix of the path, so it can be split into independent parts.
+"""
+import itertools
+import time
+from collections import deque
+
+import numpy as np
+
+from graph_input import load_graph
+from hamiltonian_cycle import find_hamiltonian_cycles
+
+
+# Number of steps of the search between two checks of the cancel event
+CANCEL_CHECK_INTERVAL = 256
+
+
+class PrunedSearch:
+    # G: dict of { node: list of neighbors }, undirected.
+    # The search starts in a node of the smallest degree (the start node), the fewer branches the better,
+    # the cycles are still returned starting and ending in the first node of G.
+    def __init__(self, G):
+        degrees = {node: len(set(neighbors) - {node}) for node, neighbors in G.items()}
+        self.start = min(G, key=degrees.get) if G else None
+        self.first = next(iter(G), None)
+        self.nodes = [self.start] + [node for node in G if node != self.start] if G else []
+        index = {node: i for i, node in enumerate(self.nodes)}
+        self.n = len(self.nodes)
+        neighbor_sets = [set() for _ in range(self.n)]
+        for node, neighbors in G.items():
+            for neighbor in neighbors:
+                i, j = index[node], index[neighbor]
+                if i != j:
+                    neighbor_sets[i].add(j)
+                    neighbor_sets[j].add(i)
+        self.index = index
+        self.neighbor_sets = neighbor_sets
+        self.neighbors = [sorted(neighbors) for neighbors in neighbor_sets]
+        self.stats = {'nodes': 0}
+
+    def _reset(self):
+        self.visited = bytearray(self.n)
+        self.free_degree = [len(neighbors) for neighbors in self.neighbors]  # Number of unvisited neighbors
+        self.path = []
+        self.second = None  # Second node of the path, the last one must come after it
+        self.closers_left = 0  # Unvisited neighbors of the start node that can close the cycle
+
+    def _is_closer(self, x):
+        return self.second is not None and x > self.second and x in self.neighbor_sets[0]
+
+    def _usable(self, x, end):
+        # Number of the neighbors the unvisited node x can still use in the cycle
+        return self.free_degree[x] + (end in self.neighbor_sets[x]) + self._is_closer(x)
+
+    def _needed_by(self, y, end):
+        # Number of the unvisited neighbors of y which can only use two neighbors (y is one of them)
+        if y == 0:
+            return sum(1 for z in self.neighbors[0] if self._is_closer(z) and not self.visited[z] and
+                       self._usable(z, end) == 2)
+        return sum(1 for z in self.neighbors[y] if not self.visited[z] and self._usable(z, end) == 2)
+
+    def _visit(self, x):
+        self.visited[x] = 1
+        for y in self.neighbors[x]:
+            self.free_degree[y] -= 1
+        self.path.append(x)
+        if len(self.path) == 2:
+            self.second = x
+            self.closers_left = sum(1 for y in self.neighbors[0] if y > x)
+        elif self._is_closer(x):
+            self.closers_left -= 1
+
+    def _unvisit(self, x):
+        if len(self.path) == 2:
+            self.second = None
+            self.closers_left = 0
+        elif self._is_closer(x):
+            self.closers_left += 1
+        self.path.pop()
+        for y in self.neighbors[x]:
+            self.free_degree[y] += 1
+        self.visited[x] = 0
+
+    def _feasible(self, old_end, end):
+        # Whether the path can still be completed after it moved from old_end to end
+        remaining = self.n - len(self.path)
+        if remaining == 0:
+            return True  # Closing the cycle is checked by the caller
+        if self.closers_left == 0:
+            return False
+
+        # Degree: the old end is no more usable for its unvisited neighbors
+        forced = []
+        for x in self.neighbors[old_end]:
+            if not self.visited[x]:
+                usable = self._usable(x, end)
+                if usable < 2:
+                    return False
+                if usable == 2:
+                    forced.append(x)
+
+        # Forced edges: a node with two usable neighbors needs both of them, and an unvisited
+        # node can't be needed by more than two such nodes, the start node by more than one
+        for x in forced:
+            for y in self.neighbors[x]:
+                if not self.visited[y] and self._needed_by(y, end) > 2:
+                    return False
+            if self._is_closer(x) and self._needed_by(0, end) > 1:
+                return False
+
+        # Connectivity of the unvisited nodes through the new end
+        if self.free_degree[old_end] >= 1:
+            seen = {end}
+            queue = deque([end])
+            reached = 0
+            while queue:
+                x = queue.popleft()
+                for y in self.neighbors[x]:
+                    if not self.visited[y] and y not in seen:
+                        seen.add(y)
+                        reached += 1
+                        queue.append(y)
+            if reached != remaining:
+                return False
+        return True
+
+    def _candidates(self, end):
+        # Unvisited neighbors of the end to try, the forced one or all from the fewest options
+        options = [(self._usable(x, end), x) for x in self.neighbors[end] if not self.visited[x]]
+        forced = [x for usable, x in options if usable <= 2]
+        if len(self.path) == 1:
+            # The start node has two free edges, one to the second node and one to the last
+            if len(forced) > 2:
+                return []
+            if len(forced) == 2:
+                return [min(forced)]  # The other one is the last node
+        elif len(forced) > 1:
+            return []
+        elif forced:
+            return forced
+        return [x for _, x in sorted(options)]
+
+    def _cycle(self):
+        # The path as a cycle starting and ending in the first node of G
+        cycle = [self.nodes[i] for i in self.path]
+        rotation = cycle.index(self.first)
+        cycle = cycle[rotation:] + cycle[:rotation]
+        return cycle + [cycle[0]]
+
+    def _closes(self):
+        end = self.path[-1]
+        return 0 in self.neighbor_sets[end] and self.second < end
+
+    def _search(self, build, cancel=None):
+        # Depth first search from the current path with an explicit stack instead of recursion,
+        # stack[i] holds the candidates not tried yet for the node i of the path after the prefix.
+        # Yields the cycles, or True for each cycle if build is False.
+        # cancel: an event (e.g. multiprocessing.Event), the search stops soon after it is set
+        self.stats['nodes'] += 1
+        if len(self.path) == self.n:
+            if self._closes():
+                yield self._cycle() if build else True
+            return
+
+        stack = [iter(self._candidates(self.path[-1]))]
+        steps = 0
+        while stack:
+            steps += 1
+            if cancel is not None and steps % CANCEL_CHECK_INTERVAL == 0 and cancel.is_set():
+                return
+            x = next(stack[-1], None)
+            if x is None:
+                # All the candidates tried, backtrack
+                stack.pop()
+                if stack:
+                    self._unvisit(self.path[-1])
+                continue
+
+            end = self.path[-1]
+            self._visit(x)
+            if not self._feasible(end, x):
+                self._unvisit(x)
+                continue
+            self.stats['nodes'] += 1
+            if len(self.path) == self.n:
+                if self._closes():
+                    yield self._cycle() if build else True
+                self._unvisit(x)
+                continue
+            stack.append(iter(self._candidates(x)))
+
+    def prefixes(self, depth):
+        # All the beginnings of depth + 1 nodes (or fewer for a small graph) of the paths the search
+        # extends, in the order of the search. The cycles extending different prefixes are different.
+        if self.n < 3:
+            return []
+        self._reset()
+        self._visit(0)
+        result = []
+
+        def extend():
+            if len(self.path) == min(depth + 1, self.n):
+                result.append([self.nodes[i] for i in self.path])
+                return
+            end = self.path[-1]
+            for x in self._candidates(end):
+                self._visit(x)
+                if self._feasible(end, x):
+                    extend()
+                self._unvisit(x)
+
+        extend()
+        return result
+
+    def cycles(self, prefix=(), build=True, cancel=None):
+        # Generator of the Hamiltonian cycles as lists of nodes starting and ending in the first node of G.
+        # prefix: nodes of the beginning of the path, starting with self.start, only the cycles
+        # extending it are searched
+        # build: if False, True is yielded for every cycle instead of the cycle
+        # cancel: an event, the search stops soon after it is set
+        if self.n < 3:
+            return
+        self._reset()
+        prefix = [self.index[node] for node in prefix] or [0]
+        if prefix[0] != 0:
+            raise ValueError(f"The prefix must start with the start node {self.start!r}")
+        for i, x in enumerate(prefix):
+            if self.visited[x] or (i and x not in self.neighbor_sets[prefix[i - 1]]):
+                raise ValueError("The prefix is not a path in G")
+            self._visit(x)
+            if i and not self._feasible(prefix[i - 1], x):
+                return
+        yield from self._search(build, cancel)
+
+
+def pruned_hamiltonian_cycles(G, prefix=(), stats=None):
+    # Generator of the Hamiltonian cycles of G, each once. If stats is a dict, stats['nodes'] counts the search nodes.
+    search = PrunedSearch(G)
+    try:
+        yield from search.cycles(prefix)
+    finally:
+        if stats is not None:
+            stats['nodes'] = stats.get('nodes', 0) + search.stats['nodes']
+
+
+def hamiltonian_cycles(graph, limit=None, count_only=False, stats=None):
+    # Hamiltonian cycles of any graph load_graph() accepts, each once, found lazily.
+    # Returns a generator of the cycles (lists of nodes starting and ending in the first node),
+    # or their number if count_only is set. limit: stop after that many cycles.
+    # If stats is a dict, stats['nodes'] counts the search nodes.
+    search = PrunedSearch(load_graph(graph))
+
+    def generate(build):
+        try:
+            yield from itertools.islice(search.cycles(build=build), limit)
+        finally:
+            if stats is not None:
+                stats['nodes'] = stats.get('nodes', 0) + search.stats['nodes']
+
+    if count_only:
+        return sum(1 for _ in generate(False))
+    return generate(True)
+
+
+def random_hamiltonian_graph(n, extra_edges, seed=None):
+    # Random graph with a hidden Hamiltonian cycle and extra random edges
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(n)
+    G = {i: set() for i in range(n)}
+    for a, b in zip(order, np.roll(order, 1)):
+        G[int(a)].add(int(b))
+        G[int(b)].add(int(a))
+    for _ in range(extra_edges):
+        a, b = (int(x) for x in rng.choice(n, 2, replace=False))
+        G[a].add(b)
+        G[b].add(a)
+    return {node: sorted(neighbors) for node, neighbors in G.items()}
+
+
+if __name__ == "__main__":
+    import networkx as nx
+
+    # Every cycle of the backtracking, once in one direction
+    for seed in range(200):
+        n = 3 + seed % 8
+        G = nx.to_dict_of_lists(nx.erdos_renyi_graph(n, 0.5, seed=seed))
+        expected = find_hamiltonian_cycles(G)
+        found = list(pruned_hamiltonian_cycles(G))
+        assert sorted(found + [cycle[::-1] for cycle in found]) == sorted(expected)
+    print("Pruned search agrees with find_hamiltonian_cycles on 200 random graphs")
+
+    for n in (60, 80, 100):
+        G = random_hamiltonian_graph(n, n, seed=n)
+        stats = {}
+        start = time.perf_counter()
+        cycle = next(pruned_hamiltonian_cycles(G, stats=stats), None)
+        print(f"n = {n}, {sum(map(len, G.values())) // 2} edges: {'a cycle' if cycle else 'no cycle'} found "
+              f"in {time.perf_counter() - start:.2f} s, {stats['nodes']} search nodes")
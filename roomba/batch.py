@@ -0,0 +1,187 @@
+"""
+Runs the roomba heuristic on many random rooms in parallel.
+
+Each scenario is generated from its seed the same way as in roomba.ipynb: litter is
+scattered uniformly over the room (duplicates merge) and the roomba starts at a random point.
+
+Usage:
+    python -m roomba.batch --seeds 0 1000 --size 30 30 --sources 8 --diagonal --output results.csv
+"""
+import argparse
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from roomba.roomba_path import LocalMaximumError, PotentialGrid, path_length, roomba_path
+
+logger = logging.getLogger(__name__)
+
+# One row of the results table
+RESULT_DTYPE = np.dtype([
+    ('seed', np.int64),
+    ('steps', np.int64),         # Number of moves of the roomba, up to the local maximum if stuck
+    ('path_length', np.float64),  # Length of the path, a diagonal move counts as sqrt(2)
+    ('pickups', np.int64),       # Number of collected litter
+    ('cleared', np.bool_),       # False if the roomba got stuck before collecting everything
+    ('wall_time', np.float64),   # Seconds spent in roomba_path
+])
+
+# Potential mask shared by all the scenarios in a worker process, see _init_worker()
+_worker_mask = None
+_worker_shared_memory = None
+
+
+def random_scenario(seed: int, room_shape: tuple, num_sources: int):
+    """
+    Generates the litter and the starting point of one scenario.
+
+    Args:
+        seed (int): Seed of the scenario.
+        room_shape (tuple): The dimensions of the room (height, width).
+        num_sources (int): Number of litter to scatter, duplicates merge.
+
+    Returns:
+        tuple: (sources, starting_point) with sources as a dict of positions to True.
+    """
+    rng = np.random.default_rng(seed)
+    sources = {(int(rng.integers(0, room_shape[0])), int(rng.integers(0, room_shape[1]))): True
+               for _ in range(num_sources)}
+    starting_point = (int(rng.integers(0, room_shape[0])), int(rng.integers(0, room_shape[1])))
+    return sources, starting_point
+
+
+def run_scenario(seed: int, room_shape: tuple, num_sources: int, allow_diagonal: bool,
+                 potential_mask: np.ndarray = None):
+    """
+    Runs roomba_path quietly on one random scenario.
+
+    Args:
+        seed (int): Seed of the scenario.
+        room_shape (tuple): The dimensions of the room (height, width).
+        num_sources (int): Number of litter to scatter.
+        allow_diagonal (bool): If True, diagonal moves are allowed.
+        potential_mask (numpy.ndarray): Precomputed rounded mask for the room shape and
+            metric (PotentialGrid.exact False), computed if not given. It is only read.
+
+    Returns:
+        tuple: One row of the results table, see RESULT_DTYPE.
+    """
+    sources, starting_point = random_scenario(seed, room_shape, num_sources)
+
+    grid = PotentialGrid(room_shape)
+    grid.sources = sources
+    grid.allow_diagonal = allow_diagonal
+    grid.exact = False  # Rounded mask, every pickup costs O(H*W)
+    if potential_mask is None:
+        grid.initialize_potential_mask()
+    else:
+        grid.potential_mask = potential_mask
+
+    start = time.perf_counter()
+    try:
+        path = roomba_path(starting_point, grid, log=None)
+        cleared = True
+    except LocalMaximumError as error:
+        # Stuck in a local maximum, the steps and the length are those of the path up to it
+        path = error.path
+        cleared = False
+    wall_time = time.perf_counter() - start
+
+    steps = sum(1 for a, b in zip(path, path[1:]) if a != b)
+    pickups = len(sources) - grid.num_active_sources
+    logger.debug("Seed %d: %d steps, %d pickups, cleared=%s", seed, steps, pickups, cleared)
+    return seed, steps, path_length(path), pickups, cleared, wall_time
+
+
+def _init_worker(shared_memory_name: str, shape: tuple):
+    global _worker_mask, _worker_shared_memory
+    _worker_shared_memory = shared_memory.SharedMemory(name=shared_memory_name)
+    _worker_mask = np.ndarray(shape, dtype=np.float64, buffer=_worker_shared_memory.buf)
+
+
+def _run_shared_scenario(seed: int, room_shape: tuple, num_sources: int, allow_diagonal: bool):
+    return run_scenario(seed, room_shape, num_sources, allow_diagonal, _worker_mask)
+
+
+def run_batch(seeds, room_shape: tuple, num_sources: int, allow_diagonal: bool = False,
+              processes: int = None, chunksize: int = 16):
+    """
+    Runs the scenarios of the given seeds in a process pool.
+
+    The potential mask is computed once and shared with the workers through
+    shared memory, so it is neither recomputed nor copied per scenario.
+
+    Args:
+        seeds (iterable): Seeds of the scenarios, e.g. range(1000).
+        room_shape (tuple): The dimensions of the room (height, width).
+        num_sources (int): Number of litter to scatter in each room.
+        allow_diagonal (bool): If True, diagonal moves are allowed.
+        processes (int): Number of worker processes, all CPU cores if None.
+            With processes=1 the scenarios run in this process.
+        chunksize (int): Number of scenarios sent to a worker at once.
+
+    Returns:
+        numpy.ndarray: Structured array with one row per scenario, see RESULT_DTYPE.
+    """
+    seeds = list(seeds)
+    room_shape = tuple(room_shape)
+
+    grid = PotentialGrid(room_shape)
+    grid.allow_diagonal = allow_diagonal
+    grid.exact = False  # The shared mask is rounded, as run_scenario expects
+    grid.initialize_potential_mask()
+    mask = grid.potential_mask
+
+    if processes == 1:
+        rows = [run_scenario(seed, room_shape, num_sources, allow_diagonal, mask) for seed in seeds]
+        return np.array(rows, dtype=RESULT_DTYPE)
+
+    shm = shared_memory.SharedMemory(create=True, size=mask.nbytes)
+    try:
+        np.ndarray(mask.shape, dtype=mask.dtype, buffer=shm.buf)[:] = mask
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=(shm.name, mask.shape)) as executor:
+            n = len(seeds)
+            rows = list(executor.map(_run_shared_scenario, seeds, [room_shape] * n,
+                                     [num_sources] * n, [allow_diagonal] * n, chunksize=chunksize))
+    finally:
+        shm.close()
+        shm.unlink()
+    return np.array(rows, dtype=RESULT_DTYPE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seeds', type=int, nargs=2, default=(0, 100), metavar=('START', 'STOP'),
+                        help="run the seeds in range(START, STOP)")
+    parser.add_argument('--size', type=int, nargs=2, default=(30, 30), metavar=('H', 'W'))
+    parser.add_argument('--sources', type=int, default=8)
+    parser.add_argument('--diagonal', action='store_true')
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--output', help="write the results table to this CSV file")
+    parser.add_argument('--verbose', action='store_true', help="log every scenario")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format='%(message)s')
+
+    start = time.perf_counter()
+    results = run_batch(range(*args.seeds), tuple(args.size), args.sources, args.diagonal, args.processes)
+    elapsed = time.perf_counter() - start
+
+    if args.output:
+        np.savetxt(args.output, results, delimiter=',', header=','.join(RESULT_DTYPE.names), comments='',
+                   fmt=['%d', '%d', '%.6f', '%d', '%d', '%.6f'])
+
+    logger.info("%d scenarios in %.2f s (%.1f per second)", len(results), elapsed, len(results) / elapsed)
+    logger.info("Cleared: %d, stuck: %d", results['cleared'].sum(), (~results['cleared']).sum())
+    cleared = results[results['cleared']]
+    if len(cleared):
+        logger.info("Mean path length %.2f, mean steps %.1f, mean time %.4f s",
+                    cleared['path_length'].mean(), cleared['steps'].mean(), cleared['wall_time'].mean())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Compares the point-wise and the vectorized way of building the potential of the whole room,
+and the point-wise and the fast hill climbing.
+
+Usage:
+    python -m roomba.benchmark_potential --size 200 200 --sources 100
+"""
+import argparse
+import time
+
+import numpy as np
+
+from roomba.roomba_path import PotentialGrid, climb_hill, climb_hill_fast
+
+
+def pointwise_potential(grid: PotentialGrid):
+    """
+    Builds the potential of the whole room point by point, as done in roomba.ipynb.
+    """
+    potential = np.zeros(grid.room_shape)
+    for i in range(grid.room_shape[0]):
+        for j in range(grid.room_shape[1]):
+            potential[i, j] = grid.calculate_potential_in_point((i, j))
+    return potential
+
+
+def random_grid(room_shape: tuple, num_sources: int, allow_diagonal: bool, seed: int = 0):
+    """
+    Creates a potential grid with randomly placed sources.
+    """
+    rng = np.random.default_rng(seed)
+    grid = PotentialGrid(room_shape)
+    grid.sources = {(int(rng.integers(0, room_shape[0])), int(rng.integers(0, room_shape[1]))): True
+                    for _ in range(num_sources)}
+    grid.allow_diagonal = allow_diagonal
+    grid.initialize_potential_mask()
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, nargs=2, default=(100, 100), metavar=('H', 'W'))
+    parser.add_argument('--sources', type=int, default=50)
+    parser.add_argument('--diagonal', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    grid = random_grid(tuple(args.size), args.sources, args.diagonal, args.seed)
+
+    start = time.perf_counter()
+    old = pointwise_potential(grid)
+    old_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new = grid.compute_potential()
+    new_time = time.perf_counter() - start
+
+    print(f"Room {args.size[0]}x{args.size[1]}, {len(grid.sources)} sources")
+    print(f"Point-wise: {old_time:.4f} s")
+    print(f"Vectorized: {new_time:.4f} s ({old_time / new_time:.1f}x faster)")
+    print(f"Identical results: {np.array_equal(old, new)}")
+
+    # Climb from the corner farthest from the highest point, without and with the cached potential
+    peak = np.unravel_index(np.argmax(new), grid.room_shape)
+    start_pos = (0 if peak[0] >= grid.room_shape[0] / 2 else grid.room_shape[0] - 1,
+                 0 if peak[1] >= grid.room_shape[1] / 2 else grid.room_shape[1] - 1)
+
+    grid.potential = None
+    start = time.perf_counter()
+    old_path = climb_hill(start_pos, grid)
+    old_time = time.perf_counter() - start
+
+    grid.compute_potential()
+    start = time.perf_counter()
+    new_path = climb_hill_fast(start_pos, grid)
+    new_time = time.perf_counter() - start
+
+    print(f"Climb of {len(new_path) - 1} steps from {start_pos}")
+    print(f"Point-wise climb: {old_time:.4f} s")
+    print(f"Fast climb:       {new_time:.4f} s ({old_time / new_time:.1f}x faster)")
+    print(f"Identical paths: {old_path == new_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+import numpy as np
+
+
+def movement_directions(allow_diagonal: bool):
+    """
+    Returns the possible movement directions in the order in which climb_hill tries them.
+
+    Args:
+        allow_diagonal (bool): If True, diagonal moves are included.
+
+    Returns:
+        list: A list of (dx, dy) steps.
+    """
+    if allow_diagonal:
+        return [(-1, -1), (-1, 0), (-1, 1),
+                (0, -1),           (0, 1),
+                (1, -1),  (1, 0),  (1, 1)]
+    return [(-1, 0), (0, -1), (0, 1), (1, 0)]
+
+
+def geodesic_distance(occupancy: np.ndarray, source_pos: tuple, allow_diagonal: bool = False):
+    """
+    Calculates the length of the shortest path from the source to every free cell of the room.
+
+    The roomba moves between neighboring free cells, a straight step costs 1 and
+    a diagonal step (if allowed) costs sqrt(2). In an empty room this gives the
+    L1 distance without diagonal moves and the octile distance with them.
+
+    The field is computed by a vectorized wavefront: all the cells whose distance
+    improved in the last round relax their neighbors at once. Without diagonal
+    moves this is a plain BFS and every cell is visited once; with them a cell
+    is only revisited when a shorter path reaches it later, which is rare.
+
+    Args:
+        occupancy (numpy.ndarray): Boolean array of the room shape, True where there is an obstacle.
+        source_pos (tuple): The (x, y) position of the source.
+        allow_diagonal (bool): If True, diagonal moves are allowed.
+
+    Returns:
+        numpy.ndarray: Array of the room shape with the distances, inf for obstacles and
+            cells that can't be reached from the source.
+    """
+    height, width = occupancy.shape
+    padded_width = width + 2
+
+    # Free cells of the room surrounded by a border of obstacles, flattened
+    free = np.zeros((height + 2, padded_width), dtype=bool)
+    free[1:-1, 1:-1] = ~occupancy
+    free = free.ravel()
+
+    distance = np.full(free.shape, np.inf)
+    source = (source_pos[0] + 1) * padded_width + source_pos[1] + 1
+    if not free[source]:
+        return distance.reshape(height + 2, padded_width)[1:-1, 1:-1]  # Litter inside of an obstacle
+
+    directions = movement_directions(allow_diagonal)
+    offsets = np.array([dx * padded_width + dy for dx, dy in directions])
+    costs = np.array([np.sqrt(dx**2 + dy**2) for dx, dy in directions])
+
+    # Index of the candidate a cell was last written by, to drop the duplicate candidates
+    # in O(k) instead of sorting them
+    owner = np.empty(free.shape, dtype=np.int32)
+
+    distance[source] = 0
+    frontier = np.array([source])
+    while frontier.size:
+        # Relax all the neighbors of the frontier at once
+        candidates = (frontier[:, None] + offsets).ravel()
+        candidate_distance = (distance[frontier][:, None] + costs).ravel()
+        improved = free[candidates] & (candidate_distance < distance[candidates])
+        candidates = candidates[improved]
+        candidate_distance = candidate_distance[improved]
+
+        # A cell can be reached from several frontier cells, keep the shortest distance
+        np.minimum.at(distance, candidates, candidate_distance)
+        # One of the writes to every cell wins, its candidate is the one kept in the frontier
+        order = np.arange(candidates.size, dtype=np.int32)
+        owner[candidates] = order
+        frontier = candidates[owner[candidates] == order]
+
+    return distance.reshape(height + 2, padded_width)[1:-1, 1:-1]
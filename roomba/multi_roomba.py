@@ -0,0 +1,122 @@
+from roomba.roomba_path import PotentialGrid, _no_log, climb_hill_fast, movement_directions
+
+
+def multi_roomba_path(starting_points: list, potential_grid: PotentialGrid = None, log=print):
+    """
+    Finds paths for several roombas cleaning the same room together.
+
+    All the roombas share one potential field of the litter nobody has claimed yet.
+    A roomba without a task climbs that field in thought (climb_hill_fast) and claims
+    the litter on top of the hill. Claimed litter is removed from the shared field
+    at once, so the others are no longer attracted by it and go for other hills.
+    The roomba then walks to its litter following only the potential of that litter.
+    If the hill has no litter on top, the roomba claims the litter with the highest
+    potential in its position (the closest one) instead.
+
+    The roombas move in lockstep, one step each per time step, in the order of
+    `starting_points`. Claims are made one roomba at a time, so a litter is never
+    claimed twice. A claim costs O(H*W) (removal from the cached field, O(S*H*W) with
+    PotentialGrid.exact), every other step O(1), the field is never recomputed per roomba.
+
+    Args:
+        starting_points (list): The initial (x, y) positions of the roombas.
+        potential_grid (PotentialGrid): The potential grid representing the room and litter.
+        log (callable): Function called with a message about each claim and pickup,
+            None for quiet operation.
+
+    Returns:
+        list: One path per roomba, a list of its (x, y) positions in each time step.
+    """
+    if log is None:
+        log = _no_log
+
+    num_robots = len(starting_points)
+    positions = [tuple(point) for point in starting_points]
+    targets = [None] * num_robots
+    target_fields = [None] * num_robots  # Potential of the claimed litter alone
+    paths = [[position] for position in positions]
+    directions = movement_directions(potential_grid.allow_diagonal)
+
+    # The shared field only contains the litter that is neither claimed nor collected
+    potential_grid.compute_potential()
+    claimed = 0
+    # Number of claims when the idle roomba found no litter to claim, the litter only
+    # changes with a claim and an idle roomba doesn't move, so it doesn't search again before
+    unreachable_at = [None] * num_robots
+
+    while True:
+        for robot in range(num_robots):
+            if targets[robot] is None and potential_grid.num_active_sources > 0 and unreachable_at[robot] != claimed:
+                target = _choose_target(positions[robot], potential_grid)
+                if target is None:
+                    unreachable_at[robot] = claimed
+                else:
+                    # Keep the potential of the litter, remove_source drops its cached copy
+                    target_fields[robot] = potential_grid.source_potential(target)
+                    potential_grid.remove_source(target)
+                    targets[robot] = target
+                    claimed += 1
+                    log(f"Roomba {robot} at {positions[robot]} claimed litter at {target}")
+
+            if targets[robot] is not None:
+                positions[robot] = _step_towards(positions[robot], target_fields[robot], potential_grid,
+                                                 directions)
+                if positions[robot] == targets[robot]:
+                    log(f"Roomba {robot} picked up litter at {targets[robot]}")
+                    targets[robot] = None
+                    target_fields[robot] = None
+
+            paths[robot].append(positions[robot])
+
+        # Only the roombas which picked up their litter in this step haven't tried to claim another
+        if all(target is None for target in targets) and (
+                potential_grid.num_active_sources == 0 or
+                all(_unreachable(robot, positions, unreachable_at, claimed, potential_grid)
+                    for robot in range(num_robots))):
+            # Nobody has a task and nobody can reach any remaining litter
+            break
+
+    if potential_grid.num_active_sources == 0:
+        log(f"Area clear! {claimed} litter collected")
+    else:
+        log(f"Area clear of reachable litter, {potential_grid.num_active_sources} litter unreachable")
+    return paths
+
+
+def _unreachable(robot: int, positions: list, unreachable_at: list, claimed: int, potential_grid: PotentialGrid):
+    # True if the idle roomba finds no litter to claim, the result is kept in unreachable_at
+    if unreachable_at[robot] != claimed and _choose_target(positions[robot], potential_grid) is None:
+        unreachable_at[robot] = claimed
+    return unreachable_at[robot] == claimed
+
+
+def _choose_target(position: tuple, potential_grid: PotentialGrid):
+    # Top of the hill of the shared field the roomba would climb
+    peak = climb_hill_fast(position, potential_grid)[-1]
+    if potential_grid.sources.get(peak):
+        return peak
+
+    # A local maximum without litter, take the litter with the highest potential here instead
+    best_target = None
+    best_potential = 0  # Litter with zero potential is unreachable
+    for source_pos, source_potential in potential_grid.source_potentials_at(position).items():
+        if source_potential > best_potential:
+            best_potential = source_potential
+            best_target = source_pos
+    return best_target
+
+
+def _step_towards(position: tuple, field, potential_grid: PotentialGrid, directions: list):
+    # One step of climb_hill on the potential of the target alone
+    height, width = potential_grid.room_shape
+    occupancy = potential_grid.occupancy
+
+    next_pos = position
+    max_height = field[position[0], position[1]]
+    for dx, dy in directions:
+        nx, ny = position[0] + dx, position[1] + dy
+        if 0 <= nx < height and 0 <= ny < width and (occupancy is None or not occupancy[nx, ny]):
+            if field[nx, ny] > max_height:
+                max_height = field[nx, ny]
+                next_pos = (nx, ny)
+    return next_pos
@@ -1,5 +1,51 @@
+from collections import OrderedDict
+
 import numpy as np
 
+from roomba.distance_fields import geodesic_distance, movement_directions
+
+# Number of fractional bits kept in a quantized potential mask, see potential_from_distance()
+MASK_PRECISION_BITS = 32
+
+# Bytes of the potentials of single sources around obstacles kept by default, see PotentialGrid
+SOURCE_FIELDS_BUDGET = 128 * 2**20
+
+
+def potential_from_distance(r, quantized: bool = False):
+    """
+    Calculates the potential generated by a source at the given distance(s) from it.
+
+    The potential decays with 1/r, the source itself has the maximum potential 2
+    and unreachable points (r = inf) have potential 0.
+
+    Args:
+        r (numpy.ndarray): Distances from the source.
+        quantized (bool): If True, the values are rounded to multiples of
+            2**-MASK_PRECISION_BITS. Sums of up to ~10^6 of them are then exact in float64,
+            so the potential can be updated incrementally without rounding errors or order
+            dependent ties, but the ties differ from those of the exact values.
+
+    Returns:
+        numpy.ndarray: The potential in the given distances.
+    """
+    potential = 2 / (1 + r)
+    if quantized:
+        return np.round(potential * 2**MASK_PRECISION_BITS) / 2**MASK_PRECISION_BITS
+    return potential
+
+
+class LocalMaximumError(RuntimeError):
+    """
+    Raised by roomba_path when the roomba gets stuck in a local maximum without litter.
+
+    Attributes:
+        path (list): The path of the roomba up to the local maximum, inclusive.
+    """
+
+    def __init__(self, message: str, path: list):
+        super().__init__(message)
+        self.path = path
+
 
 class PotentialGrid:
     """
@@ -8,11 +54,37 @@ class PotentialGrid:
     This class creates and manages a potential field for a room, where each point
     in the room has a potential value calculated by the distance to the nearest source.
 
+    If an occupancy grid is given, the distance is the length of the shortest path
+    around the obstacles (see roomba.distance_fields.geodesic_distance) and the
+    obstacles themselves have potential -inf, so the roomba never climbs into them.
+
     Attributes:
         room_shape (tuple): The dimensions of the room (height, width).
         potential_mask (numpy.ndarray): A 2D array representing the potential field.
         sources (dict): A dictionary of potential sources with their positions as keys.
+            Change it through add_source() and remove_source(), which keep the cached
+            potential up to date. After assigning or editing it directly, call
+            compute_potential() before reading the cached potential (roomba_path does so).
         allow_diagonal (bool): If True, allows diagonal movements in potential calculations.
+        exact (bool): If False (the default), the mask is rounded (see potential_from_distance)
+            and a pickup subtracts the potential of the source from the cached potential in
+            O(H*W) without rounding errors. If True, the mask isn't rounded and a pickup sums
+            the active sources again, O(S*H*W), so the roomba takes the same path as with the
+            point-wise sums of the unrounded mask. Set it before calling
+            initialize_potential_mask(). In a room with obstacles the potentials are always
+            rounded and subtracted, summing them again would take a wavefront per source.
+        occupancy (numpy.ndarray): Optional boolean array of the room shape, True where there
+            is an obstacle. Set it before calling initialize_potential_mask().
+        source_fields (OrderedDict): Potentials of the single sources in a room with obstacles,
+            the least recently used ones are dropped beyond `source_fields_budget` bytes and
+            computed again when needed.
+        source_fields_budget (int): Bytes of `source_fields` kept, at least one field is kept.
+        potential (numpy.ndarray): Cached potential of the whole room (None until computed).
+            It is a view into `padded_potential`.
+        padded_potential (numpy.ndarray): Cached potential with a border of -inf around the room,
+            used by `climb_hill_fast` to look at neighbors without bounds checks.
+        num_active_sources (int): Number of active sources, kept by compute_potential(),
+            add_source() and remove_source().
     """
     def __init__(self, room_shape: tuple):
         """
@@ -23,8 +95,15 @@ class PotentialGrid:
         """
         self.room_shape = room_shape
         self.potential_mask = None
+        self.potential = None  # Cached potential of the whole room, see compute_potential()
+        self.padded_potential = None
         self.sources = {}  # Dict of potential sources with their positions as keys
+        self.num_active_sources = 0
         self.allow_diagonal = False
+        self.exact = False  # Unrounded mask, every pickup sums the active sources again
+        self.occupancy = None  # Boolean array, True where there is an obstacle
+        self.source_fields = OrderedDict()  # Potentials of the single sources around the obstacles
+        self.source_fields_budget = SOURCE_FIELDS_BUDGET
 
     def initialize_potential_mask(self):
         """
@@ -33,38 +112,51 @@ class PotentialGrid:
         The mask is used to calculate the potential grid for the room. It creates
         a potential field that decreases with distance from the center.
         """
-        # Initialize the potential mask with zeros
-        self.potential_mask = np.zeros((2*self.room_shape[0], 2*self.room_shape[1]))
-
         # Calculate the center of the mask
         center_x, center_y = self.room_shape[0] - 1, self.room_shape[1] - 1
 
-        # Iterate through each point in the mask
-        for i in range(2*self.room_shape[0]):
-            for j in range(2*self.room_shape[1]):
-                if self.allow_diagonal:
-                    r = np.sqrt((i - center_x)**2 + (j - center_y)**2)  # L2 distance (Euclidean)
-                else:
-                    r = np.abs(i - center_x) + np.abs(j - center_y)  # L1 distance (Manhattan)
-                
-                if r == 0:
-                    self.potential_mask[i, j] = 2  # Center point has maximum potential
-                else:
-                    self.potential_mask[i, j] = 2 / (1 + r)  # Potential decays with 1/r from center
+        # Distances of every point in the mask from the center, built by broadcasting
+        di = np.arange(2*self.room_shape[0])[:, None] - center_x
+        dj = np.arange(2*self.room_shape[1])[None, :] - center_y
+        if self.allow_diagonal:
+            r = np.sqrt(di**2 + dj**2)  # L2 distance (Euclidean)
+        else:
+            r = np.abs(di) + np.abs(dj)  # L1 distance (Manhattan)
+
+        # Potential decays with 1/r from center, center point has maximum potential 2
+        self.potential_mask = potential_from_distance(r, quantized=not self.exact)
+        self.potential = None
+        self.padded_potential = None
+        self.source_fields = OrderedDict()  # The occupancy or the metric might have changed
 
     def calculate_potential_in_point(self, point: tuple):
         """
         Calculates the potential at a given point by summing the potentials from all sources.
         Uses the potential.
 
+        If the potential of the whole room is already cached, it is read from there
+        instead of rescanning all the sources.
+
         Args:
             point (tuple): The (x, y) coordinates of the point to calculate potential for.
 
         Returns:
             float: The total potential at the given point.
         """
+        if self.potential is not None:
+            return self.potential[point[0], point[1]]
+
         if not self.sources:
             return 0
+
+        if self.occupancy is not None:
+            if self.occupancy[point[0], point[1]]:
+                return -np.inf
+            potential = 0
+            for source_pos in self.sources:
+                if self.sources[source_pos]:  # If the source is active
+                    potential += self.source_potential(source_pos)[point[0], point[1]]
+            return potential
         
         potential = 0
         for source_pos in self.sources:
@@ -75,36 +167,244 @@ class PotentialGrid:
                 potential += self.potential_mask[mask_x, mask_y]
         return potential
 
+    def source_potential(self, source_pos: tuple):
+        """
+        Returns the potential generated by a single source over the whole room.
+
+        The result is a view into the potential mask shifted so that its center
+        lies on the source, no data is copied. In a room with obstacles, the potential
+        is computed from the geodesic distance and kept in `source_fields` while it fits
+        into `source_fields_budget`. A field computed again is the same as before.
+
+        Args:
+            source_pos (tuple): The (x, y) position of the source.
+
+        Returns:
+            numpy.ndarray: Array of the room shape with the potential of the source.
+        """
+        if self.occupancy is not None:
+            source_pos = tuple(source_pos)
+            field = self.source_fields.get(source_pos)
+            if field is not None:
+                self.source_fields.move_to_end(source_pos)
+                return field
+            distance = geodesic_distance(self.occupancy, source_pos, self.allow_diagonal)
+            field = potential_from_distance(distance, quantized=True)
+            self.source_fields[source_pos] = field
+            # Drop the least recently used fields beyond the budget
+            while len(self.source_fields) > max(1, self.source_fields_budget // field.nbytes):
+                self.source_fields.popitem(last=False)
+            return field
+
+        mask_x = self.room_shape[0] - source_pos[0] - 1
+        mask_y = self.room_shape[1] - source_pos[1] - 1
+        return self.potential_mask[mask_x:mask_x + self.room_shape[0],
+                                   mask_y:mask_y + self.room_shape[1]]
+
+    def source_potentials_at(self, point: tuple):
+        """
+        Returns the potential of every active source in the given point.
+
+        In a room with obstacles, one wavefront from the point gives the distances to all
+        the sources at once (the geodesic distance is symmetric), no field of a source
+        is computed or cached.
+
+        Args:
+            point (tuple): The (x, y) coordinates of the point.
+
+        Returns:
+            dict: The potential of each active source, with the positions as keys.
+        """
+        active = [source_pos for source_pos, is_active in self.sources.items() if is_active]
+        if not active:
+            return {}
+        rows, cols = np.array(active).T
+        if self.occupancy is not None:
+            distance = geodesic_distance(self.occupancy, point, self.allow_diagonal)
+            potentials = potential_from_distance(distance[rows, cols], quantized=True)
+        else:
+            potentials = self.potential_mask[self.room_shape[0] + point[0] - rows - 1,
+                                             self.room_shape[1] + point[1] - cols - 1]
+        return dict(zip(active, potentials.tolist()))
+
+    def compute_potential(self):
+        """
+        Calculates the potential in every point of the room and caches it in `self.potential`.
+
+        The field is built by summing shifted slices of the potential mask, one per
+        active source, in the order of the sources dict. The result is therefore
+        identical to calling `calculate_potential_in_point` for every point.
+        Call this again after changing `self.sources` directly, or use
+        `add_source` and `remove_source` which keep the cached potential up to date.
+
+        Returns:
+            numpy.ndarray: Array of the room shape with the total potential. It is the cache
+                itself, updated in place by later pickups, copy it to keep this state.
+        """
+        # The room is surrounded by a border of -inf, nothing can climb there.
+        # The array is reused by later calls, e.g. from remove_source().
+        padded_shape = (self.room_shape[0] + 2, self.room_shape[1] + 2)
+        if self.padded_potential is None or self.padded_potential.shape != padded_shape:
+            self.padded_potential = np.full(padded_shape, -np.inf)
+        potential = self.padded_potential[1:-1, 1:-1]
+        potential[:] = 0
+        self.num_active_sources = 0
+        for source_pos in self.sources:
+            if self.sources[source_pos]:  # If the source is active
+                potential += self.source_potential(source_pos)
+                self.num_active_sources += 1
+        if self.occupancy is not None:
+            potential[self.occupancy] = -np.inf  # Adding or removing sources keeps the -inf
+        self.potential = potential
+        return potential
+
+    def add_source(self, source_pos: tuple):
+        """
+        Activates a source, e.g. litter that appeared during the cleaning.
 
-def roomba_path(starting_point: tuple, potential_grid: PotentialGrid = None):
+        Only the mask slice of the new source is added to the cached potential,
+        so the update costs O(H*W) regardless of the number of sources. A source which
+        was active before is added at its old place in the sum, with `exact` (and
+        no obstacles) all the active sources are summed again then.
+
+        Args:
+            source_pos (tuple): The (x, y) position of the source.
+        """
+        source_pos = tuple(source_pos)
+        if self.sources.get(source_pos):
+            return  # Already active, the litter can't be there twice
+        # A new source is the last term of the sum, the exact result is the same
+        last = source_pos not in self.sources
+        self.sources[source_pos] = True
+        self.num_active_sources += 1
+        if self.potential is not None:
+            if not self.exact or self.occupancy is not None or last:
+                self.potential += self.source_potential(source_pos)
+            else:
+                self.compute_potential()
+
+    def remove_source(self, source_pos: tuple):
+        """
+        Deactivates a source, e.g. litter collected by the roomba.
+
+        The source stays in `self.sources` marked as False and only its potential
+        is subtracted from the cached potential, O(H*W). With `exact` (and no obstacles)
+        the remaining active sources are summed again instead, subtracting would leave
+        rounding errors in the unrounded sums.
+
+        Args:
+            source_pos (tuple): The (x, y) position of the source.
+
+        Raises:
+            KeyError: If there is no active source at the given position.
+        """
+        source_pos = tuple(source_pos)
+        if not self.sources.get(source_pos):
+            raise KeyError(f"No active source at {source_pos}")
+        self.sources[source_pos] = False
+        self.num_active_sources -= 1
+        if self.potential is not None:
+            if not self.exact or self.occupancy is not None:
+                self.potential -= self.source_potential(source_pos)
+            else:
+                self.compute_potential()
+        self.source_fields.pop(source_pos, None)  # Collected litter doesn't come back often
+
+    def potential_at(self, points):
+        """
+        Calculates the potential in a batch of points using the cached potential.
+
+        Args:
+            points (array-like): Array of shape (N, 2) with (x, y) coordinates.
+
+        Returns:
+            numpy.ndarray: Array of shape (N,) with the total potential in each point.
+        """
+        if self.potential is None:
+            self.compute_potential()
+        points = np.asarray(points, dtype=int).reshape(-1, 2)
+        return self.potential[points[:, 0], points[:, 1]]
+
+
+def _no_log(message: str):
+    pass
+
+
+def path_length(path: list):
+    """
+    Calculates the length of the path, a diagonal step counts as sqrt(2).
+
+    Args:
+        path (list): A list of (x, y) coordinates, e.g. from roomba_path.
+
+    Returns:
+        float: The length of the path.
+    """
+    if len(path) < 2:
+        return 0.0
+    steps = np.diff(np.asarray(path), axis=0)
+    return float(np.sqrt((steps**2).sum(axis=1)).sum())
+
+
+def roomba_path(starting_point: tuple, potential_grid: PotentialGrid = None, on_pickup=None,
+                fast: bool = True, log=print):
     """
     Finds path for the roomba to clean a room with the given litter list (in potential_grid.sources).
 
     Args:
         starting_point (tuple): The initial (x, y) position of the Roomba.
         potential_grid (PotentialGrid): The potential grid representing the room and litter.
+        on_pickup (callable): Optional function called as on_pickup(potential_grid, position)
+            after each pickup. It may add new litter with `potential_grid.add_source`.
+        fast (bool): If True, climbs with `climb_hill_fast`, otherwise with `climb_hill`.
+            Both give the same path.
+        log (callable): Function called with a message about each step of the cleaning,
+            e.g. print or logging.getLogger(...).info. None for quiet operation.
 
     Returns:
         list: A list of (x, y) coordinates representing the path taken by the Roomba.
+
+    Raises:
+        LocalMaximumError: If the roomba gets stuck in a local maximum without litter.
+            The path up to that point is in its `path` attribute.
     """
     whole_path = [starting_point]
     current_position = starting_point
 
-    print("Current position: ", current_position)
-    print("Sources: ", [source for source in potential_grid.sources])
+    if log is None:
+        log = _no_log
+
+    log(f"Current position: {current_position}")
+    log(f"Sources: {[source for source in potential_grid.sources]}")
+
+    # Materialize the potential once, every pickup then updates it incrementally
+    potential_grid.compute_potential()
 
     # Continue cleaning while there are still active sources
-    while any([potential_grid.sources[source] for source in potential_grid.sources]):
+    while potential_grid.num_active_sources > 0:
+        if potential_grid.calculate_potential_in_point(current_position) == 0:
+            # Only litter behind obstacles is left, nothing attracts the roomba
+            log("Remaining litter is unreachable")
+            break
         # Find path to the highest potential point (likely a dirt source)
-        path = climb_hill(current_position, potential_grid)
-        print("Climbed to ", path[-1])
+        if fast:
+            path = climb_hill_fast(current_position, potential_grid)
+        else:
+            path = climb_hill(current_position, potential_grid)
+        log(f"Climbed to {path[-1]}")
         whole_path += path
         current_position = path[-1]
-        print("Removing source at ", current_position)
+        if not potential_grid.sources.get(current_position):
+            # The sum of potentials can have a local maximum away from any litter
+            raise LocalMaximumError(f"Roomba got stuck in a local maximum at {current_position}", whole_path)
+        log(f"Removing source at {current_position}")
         # Mark the source as cleaned
-        potential_grid.sources[current_position] = False
+        potential_grid.remove_source(current_position)
+        if on_pickup is not None:
+            on_pickup(potential_grid, current_position)
 
-    print('Area clear!')
+    if potential_grid.num_active_sources == 0:
+        log('Area clear!')
     return whole_path
 
 
@@ -126,12 +426,7 @@ def climb_hill(start_pos: tuple, potential_grid: PotentialGrid = None):
     path = [(start_pos[0], start_pos[1])]
 
     # Define possible movement directions
-    if potential_grid.allow_diagonal:
-        directions = [(-1, -1), (-1, 0), (-1, 1),
-                      (0, -1),           (0, 1),
-                      (1, -1),  (1, 0),  (1, 1)]
-    else:
-        directions = [(-1, 0), (0, -1), (0, 1), (1, 0)]
+    directions = movement_directions(potential_grid.allow_diagonal)
 
     # Climbing loop
     while True:
@@ -161,3 +456,52 @@ def climb_hill(start_pos: tuple, potential_grid: PotentialGrid = None):
             break
 
     return path
+
+
+def climb_hill_fast(start_pos: tuple, potential_grid: PotentialGrid = None):
+    """
+    Climbs the potential hill like climb_hill, but reads the cached potential directly.
+
+    The neighbors are looked up in the padded potential through precomputed offsets
+    of the flattened array, so each step costs O(1) regardless of the number of
+    sources and no neighbor lists are built. Neighbors are tried in the same order
+    and only a strictly higher one is taken, so the path is the same as from climb_hill.
+
+    Args:
+        start_pos (tuple): The (x, y) starting position for the hill climb.
+        potential_grid (PotentialGrid): The potential grid representing the room.
+
+    Returns:
+        list: A list of (x, y) coordinates representing the path to the highest potential point.
+    """
+    if potential_grid.potential is None:
+        potential_grid.compute_potential()
+
+    padded_width = potential_grid.room_shape[1] + 2
+    height_at = potential_grid.padded_potential.ravel().item  # ravel() of the contiguous array is a view
+
+    # Offsets of the neighbors in the flattened padded array
+    offsets = [dx * padded_width + dy for dx, dy in movement_directions(potential_grid.allow_diagonal)]
+
+    current = (start_pos[0] + 1) * padded_width + start_pos[1] + 1
+    current_height = height_at(current)
+    path = [(start_pos[0], start_pos[1])]
+
+    while True:
+        next_pos = current
+        max_height = current_height
+        for offset in offsets:
+            neighbor_height = height_at(current + offset)
+            if neighbor_height > max_height:
+                max_height = neighbor_height
+                next_pos = current + offset
+
+        if next_pos == current:
+            # Local maximum reached, end the climb
+            break
+        current = next_pos
+        current_height = max_height
+        x, y = divmod(current, padded_width)
+        path.append((x - 1, y - 1))
+
+    return path
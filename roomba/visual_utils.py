@@ -1,18 +1,105 @@
+"""
+Visualization of the potential grid and the roomba path, and export of runs for offline replay.
+
+Plotly, ipywidgets and IPython are imported only by the functions drawing something, so
+the rest of the roomba package (and the export functions here) works without them.
+
+For long runs on large rooms:
+    - the path is kept as an (N, 2) integer array, the slider shows a prefix view of it
+    - simplify_path() keeps at most max_points points of the path: the straight runs are
+      merged first (no change of the drawn line), then the points are downsampled evenly
+    - downsample_grid() shrinks the grid to at most max_cells tiles, each the maximum of a
+      block of cells, so no peak (litter) disappears
+    - save_trajectory() / load_trajectory() store the path and the grid in a compressed .npz
+"""
+import json
+
 import numpy as np
 
-# For visualization
-import plotly.graph_objects as go
-import ipywidgets as widgets
-from IPython.display import display
 
+def _plotly():
+    # Plotly and the notebook widgets, imported on the first drawing
+    import plotly.graph_objects as go
+    import ipywidgets as widgets
+    from IPython.display import display
+    return go, widgets, display
+
+
+def path_array(path) -> np.ndarray:
+    """
+    Converts a path to an array.
+
+    Args:
+        path (list): A list of (x, y) coordinates, e.g. from roomba_path, or an (N, 2) array.
+
+    Returns:
+        numpy.ndarray: Integer array of shape (N, 2).
+    """
+    return np.asarray(path, dtype=np.int64).reshape(-1, 2)
+
+
+def simplify_path(path, max_points: int = None):
+    """
+    Reduces the number of points of the path for drawing.
+
+    The points in the middle of a straight run (the same step before and after them) are
+    dropped, which doesn't change the drawn line. If more than max_points remain, they are
+    downsampled evenly, the first and the last point are always kept.
+
+    Args:
+        path (array-like): The path, see path_array.
+        max_points (int): Budget of points, None for only merging the straight runs.
+
+    Returns:
+        numpy.ndarray: Indices of the kept points in the path, increasing.
+    """
+    points = path_array(path)
+    if len(points) <= 2:
+        return np.arange(len(points))
+    steps = np.diff(points, axis=0)
+    turns = np.flatnonzero((steps[1:] != steps[:-1]).any(axis=1)) + 1
+    kept = np.concatenate([[0], turns, [len(points) - 1]])
+    if max_points is not None and len(kept) > max_points:
+        kept = kept[np.unique(np.linspace(0, len(kept) - 1, max(max_points, 2)).round().astype(np.int64))]
+    return kept
+
+
+def downsample_grid(grid: np.ndarray, max_cells: int = None):
+    """
+    Shrinks the grid into tiles of factor x factor cells, each with the maximum of its cells.
+
+    Args:
+        grid (numpy.ndarray): 2D grid, e.g. the potential.
+        max_cells (int): Budget of tiles, None to keep the grid as it is.
 
-def visualize_grid(grid):
+    Returns:
+        tuple: (tiles, factor), the tile at [i, j] covers the cells [i * factor:(i + 1) * factor,
+            j * factor:(j + 1) * factor].
+    """
+    grid = np.asarray(grid)
+    if max_cells is None or grid.size <= max_cells:
+        return grid, 1
+    factor = int(np.ceil(np.sqrt(grid.size / max_cells)))
+    while -(-grid.shape[0] // factor) * -(-grid.shape[1] // factor) > max_cells:
+        factor += 1
+    height, width = -(-grid.shape[0] // factor) * factor, -(-grid.shape[1] // factor) * factor
+    padded = np.pad(grid, ((0, height - grid.shape[0]), (0, width - grid.shape[1])), mode='edge')
+    tiles = padded.reshape(height // factor, factor, width // factor, factor).max(axis=(1, 3))
+    return tiles, factor
+
+
+def visualize_grid(grid, max_cells: int = 250_000):
     """
     Visualizes the grid
+
+    Grids of more than max_cells cells are drawn downsampled, see downsample_grid.
     """
-    # Create a meshgrid for the plot
-    x = np.arange(grid.shape[0])
-    y = np.arange(grid.shape[1])
+    go, _, _ = _plotly()
+    grid, factor = downsample_grid(grid, max_cells)
+
+    # Create a meshgrid for the plot, in the coordinates of the original grid
+    x = np.arange(grid.shape[0]) * factor
+    y = np.arange(grid.shape[1]) * factor
     x, y = np.meshgrid(x, y)
 
     # Create a surface plot using Plotly
@@ -32,14 +119,26 @@ def visualize_grid(grid):
     fig.show()
 
 
-def visualize_path(potential_grid: np.ndarray, path: list, fig_size: int = 600):
+def visualize_path(potential_grid: np.ndarray, path: list, fig_size: int = 600, max_points: int = 5000,
+                   max_cells: int = 250_000):
     """
     Visualizes the climber's path withs an interactive slider
     to move through the path points. The figure is sized to be square.
+
+    The slider goes through every step of the path, but at most max_points points of it
+    are drawn (see simplify_path) over the grid downsampled to max_cells tiles.
     """
-    
-    # Create the initial heatmap for the potential grid
-    heatmap = go.Heatmap(z=potential_grid, colorscale='Viridis', showscale=True)
+    go, widgets, display = _plotly()
+    points = path_array(path)
+    kept = simplify_path(points, max_points)
+    # Columns of the kept points, a prefix of them is a view, nothing is copied per step
+    kept_x = np.ascontiguousarray(points[kept, 1])
+    kept_y = np.ascontiguousarray(points[kept, 0])
+    tiles, factor = downsample_grid(potential_grid, max_cells)
+
+    # Create the initial heatmap for the potential grid, the tiles placed over their cells
+    heatmap = go.Heatmap(z=tiles, colorscale='Viridis', showscale=True,
+                         x0=(factor - 1) / 2, dx=factor, y0=(factor - 1) / 2, dy=factor)
 
     # Create the initial figure with the heatmap
     fig = go.Figure(data=[heatmap])
@@ -56,8 +155,8 @@ def visualize_path(potential_grid: np.ndarray, path: list, fig_size: int = 600):
 
     # Create a scatter trace for the path (initially empty)
     path_trace = go.Scatter(
-        x=[], 
-        y=[], 
+        x=[],
+        y=[],
         mode='lines+markers',
         line=dict(color='red', width=2),
         marker=dict(size=8, color='red'),
@@ -70,23 +169,69 @@ def visualize_path(potential_grid: np.ndarray, path: list, fig_size: int = 600):
 
     # Define a function to update the path trace based on slider value
     def update_path(step):
-        # Get the current path up to the slider's step
-        if step > 0:
-            current_path = path[:step]
-            x_coords, y_coords = zip(*current_path)
-            with fig_widget.batch_update():
-                fig_widget.data[1].x = y_coords
-                fig_widget.data[1].y = x_coords
-        else:
-            with fig_widget.batch_update():
-                fig_widget.data[1].x = []
-                fig_widget.data[1].y = []
+        # The kept points before the step, and the current position if it wasn't kept
+        count = int(np.searchsorted(kept, step))
+        x_coords, y_coords = kept_x[:count], kept_y[:count]
+        if step > 0 and (count == 0 or kept[count - 1] != step - 1):
+            x_coords = np.append(x_coords, points[step - 1, 1])
+            y_coords = np.append(y_coords, points[step - 1, 0])
+        with fig_widget.batch_update():
+            fig_widget.data[1].x = x_coords
+            fig_widget.data[1].y = y_coords
 
     # Create a slider for selecting the step in the path
-    slider = widgets.IntSlider(value=0, min=0, max=len(path), step=1, description="Step")
+    slider = widgets.IntSlider(value=0, min=0, max=len(points), step=1, description="Step")
 
     # Update the figure when the slider value changes
     widgets.interactive(update_path, step=slider)
 
     # Display the slider and the figure
-    display(slider, fig_widget)
\ No newline at end of file
+    display(slider, fig_widget)
+
+
+def save_trajectory(file, path, potential_grid: np.ndarray = None, dtype=np.float32, **metadata):
+    """
+    Saves a run to a compressed .npz file for replay without rerunning roomba_path.
+
+    Args:
+        file: Path or open binary file.
+        path (list): The path of the roomba, see path_array.
+        potential_grid (numpy.ndarray): Optional grid to draw the path over.
+        dtype: Type the grid is stored as, float32 halves the size and keeps -inf.
+        **metadata: Other JSON serializable information about the run (room size, seed, ...).
+    """
+    points = path_array(path)
+    # The smallest integer type holding the coordinates
+    coordinate_dtype = np.int16 if points.size == 0 or np.abs(points).max() < 2**15 else np.int32
+    arrays = {
+        'path': points.astype(coordinate_dtype),
+        'metadata': np.array(json.dumps(metadata)),
+    }
+    if potential_grid is not None:
+        arrays['potential_grid'] = np.asarray(potential_grid, dtype=dtype)
+    np.savez_compressed(file, **arrays)
+
+
+def load_trajectory(file):
+    """
+    Loads a run saved by save_trajectory.
+
+    Returns:
+        dict: 'path' (an (N, 2) int64 array), 'potential_grid' (None if not saved) and 'metadata' (dict).
+    """
+    with np.load(file) as data:
+        return {
+            'path': data['path'].astype(np.int64),
+            'potential_grid': data['potential_grid'] if 'potential_grid' in data.files else None,
+            'metadata': json.loads(str(data['metadata'])),
+        }
+
+
+def replay_trajectory(file, **kwargs):
+    """
+    Visualizes a run saved by save_trajectory, kwargs are passed to visualize_path.
+    """
+    run = load_trajectory(file)
+    if run['potential_grid'] is None:
+        raise ValueError(f"{file} has no potential grid to draw the path over")
+    visualize_path(run['potential_grid'], run['path'], **kwargs)
@@ -0,0 +1,192 @@
+"""
+Solves a whole file of sudokus in a process pool.
+
+Two formats are supported, the output has the same format as the input:
+    .txt - one puzzle per line, 81 characters, '0' or '.' for an empty cell
+    .npy - NumPy array of the shape (N, 9, 9), read and written memory-mapped
+The puzzles are read and solved in chunks and the solutions are written in the input
+order as the chunks finish, only a few chunks per worker are in memory at once.
+A puzzle that was not solved (no solution, more solutions with --unique, timeout or
+a malformed line) is written as a grid of zeros. A blank line is a malformed puzzle
+too, so the n-th output line always belongs to the n-th input line.
+
+Usage:
+    python -m sudoku.batch puzzles.txt solutions.txt --processes 8 --timeout 1
+"""
+import argparse
+import itertools
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from sudoku.solver import iter_solutions, parse_grid
+
+logger = logging.getLogger(__name__)
+
+# Status of a puzzle
+SOLVED = 0
+UNSOLVABLE = 1
+MULTIPLE = 2  # Only with check_unique
+TIMEOUT = 3
+INVALID = 4   # Malformed input
+STATUS_NAMES = ('solved', 'unsolvable', 'multiple', 'timeout', 'invalid')
+
+
+def solve_chunk(puzzles, timeout: float = None, check_unique: bool = False):
+    """
+    Solves a chunk of puzzles.
+
+    Args:
+        puzzles: List of 81 character strings or an array of the shape (N, 9, 9).
+        timeout (float): Seconds allowed for one puzzle, unlimited if None.
+        check_unique (bool): If True, a puzzle with more solutions counts as unsolved.
+
+    Returns:
+        tuple: (solutions, statuses), solutions as an int8 array of the shape (N, 81)
+            with zeros for the unsolved puzzles, statuses as an int8 array of the shape (N,).
+    """
+    solutions = np.zeros((len(puzzles), 81), dtype=np.int8)
+    statuses = np.full(len(puzzles), UNSOLVABLE, dtype=np.int8)
+    for i, puzzle in enumerate(puzzles):
+        try:
+            cells = parse_grid(puzzle)
+        except ValueError:
+            statuses[i] = INVALID
+            continue
+
+        deadline = time.perf_counter() + timeout if timeout is not None else None
+        try:
+            found = iter_solutions(cells, deadline=deadline)
+            solution = next(found, None)
+            if solution is not None:
+                if check_unique and next(found, None) is not None:
+                    statuses[i] = MULTIPLE
+                else:
+                    solutions[i] = solution
+                    statuses[i] = SOLVED
+        except TimeoutError:
+            statuses[i] = TIMEOUT
+    return solutions, statuses
+
+
+def read_chunks(path: str, chunk_size: int):
+    """
+    Generator of the chunks of puzzles of a file, see the module docstring for the formats.
+
+    Yields:
+        list or numpy.ndarray: Up to chunk_size puzzles, lines of a text file (blank lines
+            included, they are solved as invalid) or a copy of a slice of the memory-mapped array.
+    """
+    if path.endswith('.npy'):
+        puzzles = np.load(path, mmap_mode='r')
+        if puzzles.ndim != 3 or puzzles.shape[1:] != (9, 9):
+            raise ValueError(f"Expected an array of the shape (N, 9, 9), got {puzzles.shape}")
+        for start in range(0, len(puzzles), chunk_size):
+            yield np.array(puzzles[start:start + chunk_size])
+        return
+
+    with open(path) as file:
+        lines = (line.strip() for line in file)
+        while True:
+            chunk = list(itertools.islice(lines, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def solve_file(input_path: str, output_path: str, processes: int = None, chunk_size: int = 1024,
+               timeout: float = None, check_unique: bool = False):
+    """
+    Solves all the puzzles of a file and writes the solutions to another one.
+
+    Args:
+        input_path (str): A .txt or .npy file of puzzles.
+        output_path (str): File for the solutions, in the same format as the input.
+        processes (int): Number of worker processes, all CPU cores if None.
+            With processes=1 the puzzles are solved in this process.
+        chunk_size (int): Number of puzzles sent to a worker at once.
+        timeout (float): Seconds allowed for one puzzle, unlimited if None.
+        check_unique (bool): If True, a puzzle with more solutions counts as unsolved.
+
+    Returns:
+        numpy.ndarray: Number of puzzles of each status, indexed by the status constants.
+    """
+    processes = processes or os.cpu_count()
+    counts = np.zeros(len(STATUS_NAMES), dtype=np.int64)
+    chunks = read_chunks(input_path, chunk_size)
+
+    if input_path.endswith('.npy'):
+        num_puzzles = np.load(input_path, mmap_mode='r').shape[0]
+        output = np.lib.format.open_memmap(output_path, mode='w+', dtype=np.int8, shape=(num_puzzles, 9, 9))
+        written = 0
+
+        def write(solutions):
+            nonlocal written
+            output[written:written + len(solutions)] = solutions.reshape(-1, 9, 9)
+            written += len(solutions)
+    else:
+        output = open(output_path, 'w')
+
+        def write(solutions):
+            output.writelines(''.join(map(str, solution)) + '\n' for solution in solutions.tolist())
+
+    def collect(result):
+        solutions, statuses = result
+        write(solutions)
+        counts[:] += np.bincount(statuses, minlength=len(STATUS_NAMES))
+        logger.debug("%d puzzles done", counts.sum())
+
+    try:
+        if processes == 1:
+            for chunk in chunks:
+                collect(solve_chunk(chunk, timeout, check_unique))
+        else:
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                # Keep a few chunks per worker in flight, the results are written in the input order
+                max_pending = 2 * processes
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(executor.submit(solve_chunk, chunk, timeout, check_unique))
+                    if len(pending) >= max_pending:
+                        collect(pending.popleft().result())
+                while pending:
+                    collect(pending.popleft().result())
+    finally:
+        if isinstance(output, np.memmap):
+            output.flush()
+        else:
+            output.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help="puzzles, .txt or .npy")
+    parser.add_argument('output', help="solutions, in the same format as the input")
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=1024)
+    parser.add_argument('--timeout', type=float, default=None, help="seconds allowed for one puzzle")
+    parser.add_argument('--unique', action='store_true', help="count puzzles with more solutions as failures")
+    parser.add_argument('--verbose', action='store_true', help="log every finished chunk")
+    args = parser.parse_args()
+
+    if args.input.endswith('.npy') != args.output.endswith('.npy'):
+        parser.error("the input and the output must have the same format")
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format='%(message)s')
+
+    start = time.perf_counter()
+    counts = solve_file(args.input, args.output, args.processes, args.chunk_size, args.timeout, args.unique)
+    elapsed = time.perf_counter() - start
+
+    total = counts.sum()
+    logger.info("%d puzzles in %.2f s (%.1f per second)", total, elapsed, total / elapsed if elapsed else 0)
+    logger.info(", ".join(f"{name}: {count}" for name, count in zip(STATUS_NAMES, counts)))
+
+
+if __name__ == '__main__':
+    main()
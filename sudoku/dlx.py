@@ -0,0 +1,424 @@
+"""
+Exact-cover solver (Knuth's Algorithm X with dancing links) and a sudoku front end for any box size.
+
+The links of the matrix are kept in flat lists of integers indexed by node (struct of arrays)
+instead of a Python object per node, lists rather than array.array because reading an
+array.array item creates a new int object, which makes the search about twice slower:
+    node 0                  - the root, the headers of the uncovered columns are linked to it
+    nodes 1 ... columns     - the column headers, size[c] is the number of rows left in column c
+    the rest                - one node per 1 in the matrix, the nodes of a row are consecutive
+left/right link the nodes of a row (and the headers), up/down the nodes of a column,
+column[node] is its header and row[node] its row.
+
+Covering a column unlinks it and all the rows intersecting it, uncovering in the reverse
+order links them back, so the matrix is the same after any search. A sudoku of box size b
+(N = b * b digits) is the exact cover of 4 N^2 columns (every cell, every digit in every row,
+column and box) by N^3 rows (a digit in a cell). The matrix is built once per box size and
+reused: the givens of a puzzle are selected (their columns covered) before the search and
+deselected after it.
+
+Usage (from the root of the repository):
+    python -m sudoku.dlx
+"""
+import time
+
+import numpy as np
+
+# Symbols of the digits in sudoku strings, '0' or '.' is an empty cell
+SYMBOLS = '123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+class ExactCover:
+    """
+    Dancing-links matrix of an exact-cover problem.
+
+    Attributes:
+        num_columns (int): Number of columns (constraints), numbered 0 ... num_columns - 1.
+        num_rows (int): Number of rows (choices).
+        first (list): Index of the first node of each row.
+        stats (dict): 'nodes' counts the rows tried by the searches.
+    """
+
+    def __init__(self, num_columns: int, rows: list):
+        """
+        Builds the matrix.
+
+        Args:
+            num_columns (int): Number of columns.
+            rows (list): The columns of each row, as lists of column numbers.
+        """
+        self.num_columns = num_columns
+        self.num_rows = len(rows)
+        num_nodes = 1 + num_columns + sum(len(columns) for columns in rows)
+
+        # Links of the headers, the row nodes are filled in below
+        headers = list(range(num_columns + 1))
+        left = [h - 1 for h in headers] + [0] * (num_nodes - num_columns - 1)
+        right = [h + 1 for h in headers] + [0] * (num_nodes - num_columns - 1)
+        left[0] = num_columns
+        right[num_columns] = 0
+        up = headers + [0] * (num_nodes - num_columns - 1)
+        down = headers + [0] * (num_nodes - num_columns - 1)
+        column = headers + [0] * (num_nodes - num_columns - 1)
+        row = [-1] * num_nodes
+        size = [0] * (num_columns + 1)
+        first = [0] * len(rows)
+
+        node = num_columns + 1
+        for r, columns in enumerate(rows):
+            first[r] = node
+            start = node
+            for c in columns:
+                if not 0 <= c < num_columns:
+                    raise ValueError(f"Row {r} has the column {c} out of range")
+                header = c + 1
+                # Append the node to the bottom of the column
+                column[node] = header
+                row[node] = r
+                up[node] = up[header]
+                down[node] = header
+                down[up[header]] = node
+                up[header] = node
+                size[header] += 1
+                left[node] = node - 1
+                right[node] = node + 1
+                node += 1
+            if node > start:
+                left[start] = node - 1
+                right[node - 1] = start
+
+        self.left, self.right, self.up, self.down = left, right, up, down
+        self.column, self.row, self.size, self.first = column, row, size, first
+        self.stats = {'nodes': 0}
+        self._searching = False
+
+    def _cover(self, header: int):
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        right[left[header]] = right[header]
+        left[right[header]] = left[header]
+        i = down[header]
+        while i != header:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def _uncover(self, header: int):
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        i = up[header]
+        while i != header:
+            j = left[i]
+            while j != i:
+                size[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[header]] = header
+        left[right[header]] = header
+
+    def _select(self, node: int):
+        # Covers the other columns of the row of the node (its own column is covered already)
+        right = self.right
+        j = right[node]
+        while j != node:
+            self._cover(self.column[j])
+            j = right[j]
+
+    def _deselect(self, node: int):
+        left = self.left
+        j = left[node]
+        while j != node:
+            self._uncover(self.column[j])
+            j = left[j]
+
+    def _is_uncovered(self, header: int) -> bool:
+        return self.right[self.left[header]] == header
+
+    def solutions(self, given: list = ()):
+        """
+        Generator of all the exact covers containing the given rows.
+
+        The matrix is restored when the generator finishes or is closed, so it can be
+        searched again, e.g. with other given rows. Only one search of a matrix can run at a time.
+
+        Args:
+            given (list): Rows that must be in the cover.
+
+        Yields:
+            list: The rows of a cover, given rows first. The list is reused, copy it to keep it.
+
+        Raises:
+            RuntimeError: If another search of the matrix hasn't finished yet.
+        """
+        if self._searching:
+            raise RuntimeError("The matrix is already being searched, finish or close the other search first")
+        self._searching = True
+        right, down, size, column, row = self.right, self.down, self.size, self.column, self.row
+        selected = []  # Given rows covered so far, to be taken back in the reverse order
+        stack = []  # (header, node) of every level of the search
+        try:
+            for r in given:
+                node = self.first[r]
+                # The row must not clash with the given rows selected before it
+                j = node
+                while True:
+                    if not self._is_uncovered(column[j]):
+                        return
+                    j = right[j]
+                    if j == node:
+                        break
+                self._cover(column[node])
+                self._select(node)
+                selected.append(node)
+
+            cover = [row[node] for node in selected]
+            while True:
+                if right[0] == 0:
+                    yield cover
+                    descend = False
+                else:
+                    # Column with the fewest rows left
+                    header = best = right[0]
+                    best_size = size[header]
+                    while header != 0 and best_size > 1:
+                        header = right[header]
+                        if header and size[header] < best_size:
+                            best, best_size = header, size[header]
+                    descend = best_size > 0
+                    if descend:
+                        self._cover(best)
+                        node = down[best]
+                        self._select(node)
+                        self.stats['nodes'] += 1
+                        stack.append((best, node))
+                        cover.append(row[node])
+                        continue
+
+                # Backtrack to the deepest level with a row left to try
+                while stack:
+                    header, node = stack.pop()
+                    cover.pop()
+                    self._deselect(node)
+                    node = down[node]
+                    if node != header:
+                        self._select(node)
+                        self.stats['nodes'] += 1
+                        stack.append((header, node))
+                        cover.append(row[node])
+                        break
+                    self._uncover(header)
+                else:
+                    return
+        finally:
+            # Closed early or finished, undo the search levels left and the given rows
+            while stack:
+                header, node = stack.pop()
+                self._deselect(node)
+                self._uncover(header)
+            for node in reversed(selected):
+                self._deselect(node)
+                self._uncover(column[node])
+            self._searching = False
+
+    def count(self, given: list = (), limit: int = None) -> int:
+        """
+        Counts the exact covers containing the given rows, up to the limit (None for all of them).
+        """
+        count = 0
+        solutions = self.solutions(given)
+        try:
+            for _ in solutions:
+                count += 1
+                if limit is not None and count >= limit:
+                    break
+        finally:
+            solutions.close()
+        return count
+
+
+class DLXSudoku:
+    """
+    Sudoku of any box size as an exact cover, the matrix is shared by all the puzzles.
+
+    Attributes:
+        box (int): Size of a box, 3 for the classic 9x9 sudoku.
+        size (int): Number of digits and of the cells in a row, box * box.
+        matrix (ExactCover): The exact-cover matrix.
+    """
+
+    def __init__(self, box: int = 3):
+        n = box * box
+        self.box = box
+        self.size = n
+        rows = []
+        for i in range(n):
+            for j in range(n):
+                b = (i // box) * box + j // box
+                for d in range(n):
+                    rows.append([i * n + j, n * n + i * n + d, 2 * n * n + j * n + d, 3 * n * n + b * n + d])
+        self.matrix = ExactCover(4 * n * n, rows)
+
+    def parse(self, grid) -> list:
+        """
+        Converts a grid to a list of size^2 digits.
+
+        Args:
+            grid: NumPy array or nested list of shape (size, size) or a flat sequence of size^2
+                digits (0 for an empty cell), or a string of size^2 symbols (SYMBOLS, '0' or '.'
+                for an empty cell).
+
+        Returns:
+            list: The digits in row-major order.
+
+        Raises:
+            ValueError: If the grid has a wrong number of cells or a digit out of range.
+        """
+        n = self.size
+        if isinstance(grid, str):
+            if len(grid) != n * n:
+                raise ValueError(f"A sudoku string of size {n} must have {n * n} characters")
+            symbols = SYMBOLS[:n]
+            if any(char not in '.0' + symbols for char in grid):
+                raise ValueError(f"A sudoku string of size {n} can only contain '.', '0' and {symbols}")
+            return [0 if char in '.0' else symbols.index(char) + 1 for char in grid]
+
+        cells = np.asarray(grid)
+        if cells.size != n * n:
+            raise ValueError(f"A sudoku grid of size {n} must have {n * n} cells, got {cells.size}")
+        if ((cells < 0) | (cells > n)).any():
+            raise ValueError(f"A sudoku grid of size {n} can only contain digits 0-{n}")
+        return [int(digit) for digit in cells.ravel()]
+
+    def iter_solutions(self, grid):
+        """
+        Generator of all the solutions of the grid.
+
+        Yields:
+            list: The size^2 digits of a solution in row-major order.
+        """
+        n = self.size
+        cells = self.parse(grid)
+        given = [cell * n + digit - 1 for cell, digit in enumerate(cells) if digit]
+        for cover in self.matrix.solutions(given):
+            solution = [0] * (n * n)
+            for r in cover:
+                solution[r // n] = r % n + 1
+            yield solution
+
+    def count(self, grid, limit: int = 2) -> int:
+        """
+        Counts the solutions of the grid, up to the limit (None for all of them).
+
+        With the default limit of 2 the result tells unsolvable (0), unique (1)
+        and multiple (2) solutions apart.
+        """
+        n = self.size
+        cells = self.parse(grid)
+        return self.matrix.count([cell * n + digit - 1 for cell, digit in enumerate(cells) if digit], limit)
+
+    def solve(self, grid, check_unique: bool = False):
+        """
+        Solves the sudoku.
+
+        Args:
+            grid: The puzzle, see parse().
+            check_unique (bool): Whether to search on after the first solution and make sure it's the only one.
+
+        Returns:
+            np.ndarray: The solved size x size grid, or None if the sudoku has no solution.
+
+        Raises:
+            ValueError: If the grid is malformed, or check_unique is set and the sudoku has several solutions.
+        """
+        solutions = self.iter_solutions(grid)
+        try:
+            solution = next(solutions, None)
+            if solution is None:
+                return None
+            if check_unique and next(solutions, None) is not None:
+                raise ValueError("The sudoku has more than one solution")
+        finally:
+            solutions.close()
+        return np.array(solution).reshape(self.size, self.size)
+
+    def is_valid_solution(self, solution) -> bool:
+        # Every row, column and box contains all the digits 1 ... size
+        n, box = self.size, self.box
+        cells = np.asarray(self.parse(solution)).reshape(n, n)
+        boxes = cells.reshape(box, box, box, box).swapaxes(1, 2).reshape(n, n)
+        digits = np.arange(1, n + 1)
+        return all((np.sort(units, axis=1) == digits).all() for units in (cells, cells.T, boxes))
+
+
+# Solvers built so far, by box size
+_solvers = {}
+
+
+def get_solver(box: int = 3) -> DLXSudoku:
+    """
+    Returns the solver of the box size, building its matrix only the first time.
+    """
+    if box not in _solvers:
+        _solvers[box] = DLXSudoku(box)
+    return _solvers[box]
+
+
+def random_puzzle(box: int, blanks: float, seed=None) -> list:
+    """
+    Random sudoku of the box size, a shuffled solved grid with a fraction of the cells emptied.
+
+    The puzzle is solvable, but not necessarily uniquely.
+    """
+    rng = np.random.default_rng(seed)
+    n = box * box
+    # Solved grid by the pattern (box * (i % box) + i // box + j) % n, digits, rows and columns shuffled
+    # (rows and columns only within their bands and stacks, and the bands and stacks among themselves)
+    def shuffled_lines():
+        return [group * box + line for group in rng.permutation(box) for line in rng.permutation(box)]
+    rows, cols = shuffled_lines(), shuffled_lines()
+    digits = rng.permutation(n) + 1
+    grid = np.array([[digits[(box * (i % box) + i // box + j) % n] for j in cols] for i in rows])
+    grid.ravel()[rng.choice(n * n, int(blanks * n * n), replace=False)] = 0
+    return grid.ravel().tolist()
+
+
+if __name__ == "__main__":
+    from sudoku.solver import solve_sudoku
+
+    puzzles = {
+        'easy': "530070000600195000098000060800060003400803001700020006060000280000419005000080079",
+        'hard': "800000000003600000070090200050007000000045700000100030001000068008500010090000400",
+        'hardest (17 givens)': "000000010400000000020000000000050407008000300001090000300400200050100000000806000",
+    }
+    start = time.perf_counter()
+    solver = get_solver(3)
+    print(f"9x9 matrix built in {(time.perf_counter() - start) * 1000:.1f} ms")
+    for name, puzzle in puzzles.items():
+        start = time.perf_counter()
+        solution = solver.solve(puzzle, check_unique=True)
+        elapsed = time.perf_counter() - start
+        assert solver.is_valid_solution(solution)
+        assert (solution == solve_sudoku(puzzle)).all()
+        print(f"{name}: solved and checked unique in {elapsed * 1000:.1f} ms")
+
+    assert solver.count(np.zeros((9, 9), dtype=int)) == 2
+    assert solver.count("55" + "0" * 79) == 0
+
+    # Random holes are hardest around a half of the cells (a phase transition), these are on both sides of it
+    for box, blanks in ((4, 0.6), (5, 0.4), (5, 0.8)):
+        start = time.perf_counter()
+        solver = get_solver(box)
+        print(f"{box * box}x{box * box} matrix built in {(time.perf_counter() - start) * 1000:.1f} ms")
+        for seed in range(3):
+            puzzle = random_puzzle(box, blanks, seed)
+            start = time.perf_counter()
+            solution = solver.solve(puzzle)
+            elapsed = time.perf_counter() - start
+            assert solver.is_valid_solution(solution)
+            assert all(given in (0, digit) for given, digit in zip(puzzle, solution.ravel()))
+            print(f"{box * box}x{box * box} with {int(blanks * 100)} % blanks: solved in {elapsed * 1000:.1f} ms, "
+                  f"{solver.count(puzzle, limit=2)} solutions up to 2")